@@ -1,31 +1,73 @@
 import os
 import tempfile
 import logging
-from datetime import datetime
-from flask import Flask, render_template, request, redirect, url_for, flash, send_file, jsonify
+from datetime import datetime, timedelta
+from flask import Flask, render_template, request, redirect, url_for, flash, send_file, jsonify, Response, stream_with_context, abort, g, make_response, session
 from flask_sqlalchemy import SQLAlchemy
 from flask_wtf import FlaskForm
-from wtforms import StringField, TextAreaField, FileField, SelectField, SubmitField, PasswordField
+from wtforms import StringField, TextAreaField, FileField, SelectField, SubmitField, PasswordField, HiddenField
 from wtforms.validators import DataRequired, Email, Length, ValidationError
 from werkzeug.utils import secure_filename
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
+from markupsafe import Markup
+import click
 import io
+import csv
+import json
+import zlib
+import hashlib
+import shutil
+import mimetypes
 import uuid
+import base64
+import time
+import threading
 import traceback
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy import and_, or_, event, func, text as sa_text, update as sa_update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only
+from migrations import run_migrations
+from db_pool import engine_options, gunicorn_threads, gunicorn_workers, normalize_database_url
+import metrics
+import query_stats
+from query_stats import query_budget
+from db_routing import REPLICA_BIND, RoutingSession, pin_to_primary, read_only, use_replica_for
+from sqlite_profile import apply_sqlite_profile, sqlite_pragmas, read_pragmas
+from jobs import JobQueue
+from letters import (
+    LETTER_TEMPLATE_VERSION, letter_fields, letter_filename, render_admission_letter,
+    render_letter_to_file
+)
+from events import build_broker
+from cache import MemoryCache, DiskCache, TieredCache, SingleFlight, build_cache
+from previews import preview_key, render_preview
+from documents import put_blob, blob_key, delete_blob, iter_blobs
+from storage import ShardedStorage, build_storage
+from uploads import (
+    UploadRequest, UploadStream, InvalidUpload, check_extension, parse_upload_metadata,
+    append_upload_chunk, file_sha256
+)
+from werkzeug.exceptions import HTTPException, UnsupportedMediaType
+from werkzeug.http import is_resource_modified
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+app.request_class = UploadRequest
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-secret-key-here')
-app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///admissions.db')
+app.config['SQLALCHEMY_DATABASE_URI'] = normalize_database_url(os.environ.get('DATABASE_URL', 'sqlite:///admissions.db'))
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# SQLite connection profile (see sqlite_profile.py); ignored for other databases
+app.config['SQLITE_TUNING'] = os.environ.get('SQLITE_TUNING', 'true').lower() == 'true'
+app.config['SQLITE_JOURNAL_MODE'] = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+app.config['SQLITE_SYNCHRONOUS'] = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+app.config['SQLITE_CACHE_SIZE_KB'] = int(os.environ.get('SQLITE_CACHE_SIZE_KB', 64 * 1024))
+app.config['SQLITE_MMAP_SIZE'] = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+
 # Use temp directory for uploads on Render
 if os.environ.get('RENDER'):
     app.config['UPLOAD_FOLDER'] = tempfile.gettempdir()
@@ -37,7 +79,181 @@ else:
 
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
-db = SQLAlchemy(app)
+# Where documents and letters are kept: local, sharded or s3.
+# Uploads are always spooled in UPLOAD_FOLDER first, then handed to storage.
+STORAGE_CONFIG_KEYS = ('STORAGE_BACKEND', 'STORAGE_ROOT', 'S3_BUCKET', 'S3_PREFIX', 'S3_ENDPOINT_URL', 'S3_REGION')
+app.config['STORAGE_BACKEND'] = os.environ.get('STORAGE_BACKEND', 'sharded')
+app.config['STORAGE_ROOT'] = os.environ.get('STORAGE_ROOT', app.config['UPLOAD_FOLDER'])
+app.config['S3_BUCKET'] = os.environ.get('S3_BUCKET')
+app.config['S3_PREFIX'] = os.environ.get('S3_PREFIX', '')
+app.config['S3_ENDPOINT_URL'] = os.environ.get('S3_ENDPOINT_URL')  # e.g. a MinIO server
+app.config['S3_REGION'] = os.environ.get('S3_REGION')
+app.config['STORAGE_URL_EXPIRES'] = int(os.environ.get('STORAGE_URL_EXPIRES', 300))
+# Serving documents to reviewers: DOCUMENT_OFFLOAD hands the bytes to the front-end server
+# ('x-accel-redirect' for nginx, 'x-sendfile' for Apache/lighttpd) instead of the Python worker.
+# For nginx, DOCUMENT_ACCEL_PREFIX must be an `internal` location aliased to STORAGE_ROOT.
+app.config['DOCUMENT_OFFLOAD'] = os.environ.get('DOCUMENT_OFFLOAD', '')
+app.config['DOCUMENT_ACCEL_PREFIX'] = os.environ.get('DOCUMENT_ACCEL_PREFIX', '/protected-uploads/')
+app.config['DOCUMENT_MAX_AGE'] = int(os.environ.get('DOCUMENT_MAX_AGE', 3600))
+app.config['UPLOAD_MAX_FILE_BYTES'] = int(os.environ.get('UPLOAD_MAX_FILE_BYTES', 8 * 1024 * 1024))  # per document
+app.config['UPLOAD_SESSION_TTL_HOURS'] = int(os.environ.get('UPLOAD_SESSION_TTL_HOURS', 24))
+# gc-documents leaves unreferenced documents and stray blobs this recent alone
+app.config['GC_GRACE_SECONDS'] = int(os.environ.get('GC_GRACE_SECONDS', 3600))
+
+# Admin dashboard pagination
+app.config['ADMIN_PAGE_SIZE'] = int(os.environ.get('ADMIN_PAGE_SIZE', 50))
+app.config['ADMIN_MAX_PAGE_SIZE'] = int(os.environ.get('ADMIN_MAX_PAGE_SIZE', 200))
+app.config['API_PAGE_SIZE'] = int(os.environ.get('API_PAGE_SIZE', 100))
+app.config['API_MAX_PAGE_SIZE'] = int(os.environ.get('API_MAX_PAGE_SIZE', 1000))
+app.config['EXPORT_BATCH_SIZE'] = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+
+# Background admission letter generation
+app.config['LETTER_WORKERS'] = int(os.environ.get('LETTER_WORKERS', 2))
+app.config['LETTER_JOB_MAX_ATTEMPTS'] = int(os.environ.get('LETTER_JOB_MAX_ATTEMPTS', 3))
+app.config['LETTER_JOB_STALE_SECONDS'] = int(os.environ.get('LETTER_JOB_STALE_SECONDS', 300))
+# Render letters into memory on download when no stored copy exists
+app.config['LETTER_RENDER_ON_DEMAND'] = os.environ.get('LETTER_RENDER_ON_DEMAND', 'true').lower() == 'true'
+app.config['LETTER_CACHE_MAX_BYTES'] = int(os.environ.get('LETTER_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+app.config['LETTER_CACHE_DIR'] = os.environ.get('LETTER_CACHE_DIR')  # optional disk tier
+app.config['LETTER_CACHE_DISK_MAX_BYTES'] = int(os.environ.get('LETTER_CACHE_DISK_MAX_BYTES', 1024 * 1024 * 1024))
+# Rendered status cards: STATUS_CACHE_URL is empty for an in-process LRU, or redis://host:6379/0
+app.config['STATUS_CACHE_URL'] = os.environ.get('STATUS_CACHE_URL', '')
+app.config['STATUS_CACHE_TTL'] = int(os.environ.get('STATUS_CACHE_TTL', 60))
+app.config['STATUS_CACHE_MAX_BYTES'] = int(os.environ.get('STATUS_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+# Live status updates (SSE and long-poll): STATUS_EVENTS_URL is empty for in-process
+# pub/sub (one worker) or redis://host:6379/0 to reach applicants connected to any worker.
+# Keep STATUS_EVENTS_MAX_SECONDS under the gunicorn timeout when using sync workers.
+app.config['STATUS_EVENTS_URL'] = os.environ.get('STATUS_EVENTS_URL', '')
+app.config['STATUS_EVENTS_KEEPALIVE'] = int(os.environ.get('STATUS_EVENTS_KEEPALIVE', 10))
+app.config['STATUS_EVENTS_MAX_SECONDS'] = int(os.environ.get('STATUS_EVENTS_MAX_SECONDS', 25))
+# Document preview thumbnails for reviewers
+app.config['PREVIEW_WIDTH'] = int(os.environ.get('PREVIEW_WIDTH', 480))
+app.config['PREVIEW_WORKERS'] = int(os.environ.get('PREVIEW_WORKERS', 1))
+app.config['BULK_DECISION_MAX_IDS'] = int(os.environ.get('BULK_DECISION_MAX_IDS', 1000))
+
+# Connection pool (see db_pool.py). Each gunicorn worker gets an equal share of
+# DB_MAX_CONNECTIONS unless DB_POOL_SIZE/DB_MAX_OVERFLOW are set explicitly.
+app.config['DB_MAX_CONNECTIONS'] = int(os.environ.get('DB_MAX_CONNECTIONS', 20))
+app.config['DB_POOL_SIZE'] = int(os.environ['DB_POOL_SIZE']) if os.environ.get('DB_POOL_SIZE') else None
+app.config['DB_MAX_OVERFLOW'] = int(os.environ['DB_MAX_OVERFLOW']) if os.environ.get('DB_MAX_OVERFLOW') else None
+app.config['DB_POOL_TIMEOUT'] = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+app.config['DB_POOL_RECYCLE'] = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+app.config['DB_POOL_PRE_PING'] = os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true'
+app.config['PGBOUNCER_MODE'] = os.environ.get('PGBOUNCER_MODE', '')  # 'transaction' behind PgBouncer
+app.config['GUNICORN_WORKERS'] = gunicorn_workers()
+app.config['GUNICORN_THREADS'] = gunicorn_threads()
+# Each open event stream or long-poll holds a worker thread; past this many in one worker they get
+# 503 + Retry-After. The default leaves half the threads for ordinary pages.
+app.config['STATUS_EVENTS_MAX_STREAMS'] = int(
+    os.environ.get('STATUS_EVENTS_MAX_STREAMS', max(1, app.config['GUNICORN_THREADS'] // 2))
+)
+app.config['DB_BACKGROUND_THREADS'] = app.config['LETTER_WORKERS'] + app.config['PREVIEW_WORKERS']
+pool_metrics = metrics.PrometheusPoolMetrics()
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config, pool_metrics)
+
+# Optional read replica for read-only views (see db_routing.py)
+app.config['REPLICA_DATABASE_URL'] = normalize_database_url(os.environ.get('REPLICA_DATABASE_URL', ''))
+app.config['REPLICA_STICKY_SECONDS'] = int(os.environ.get('REPLICA_STICKY_SECONDS', 10))
+if app.config['REPLICA_DATABASE_URL']:
+    app.config['SQLALCHEMY_BINDS'] = {REPLICA_BIND: {
+        'url': app.config['REPLICA_DATABASE_URL'],
+        **engine_options(dict(app.config, SQLALCHEMY_DATABASE_URI=app.config['REPLICA_DATABASE_URL']), pool_metrics)
+    }}
+
+# Per-request SQL instrumentation (see query_stats.py)
+app.config['SERVER_TIMING'] = os.environ.get('SERVER_TIMING', 'true').lower() == 'true'
+app.config['SLOW_QUERY_MS'] = int(os.environ.get('SLOW_QUERY_MS', 200))
+app.config['QUERY_REPEAT_WARN'] = int(os.environ.get('QUERY_REPEAT_WARN', 10))  # same statement N times = likely N+1
+
+db = SQLAlchemy(app, session_options={'class_': RoutingSession})
+
+with app.app_context():
+    for engine in db.engines.values():
+        pool_metrics.install(engine)
+        query_stats.install(engine, app.config['SLOW_QUERY_MS'])
+
+if app.config['SQLITE_TUNING']:
+    with app.app_context():
+        for engine in db.engines.values():
+            apply_sqlite_profile(engine, sqlite_pragmas(app.config))
+
+@app.before_request
+def start_query_stats():
+    g.request_started = time.perf_counter()
+    query_stats.start_request()
+
+@app.after_request
+def report_query_stats(response):
+    stats = g.get('query_stats')
+    if stats is None:
+        return response
+    if app.config['SERVER_TIMING']:
+        response.headers['Server-Timing'] = query_stats.server_timing(stats, time.perf_counter() - g.request_started)
+    query_stats.check_request(stats, app.view_functions.get(request.endpoint),
+                              app.config['QUERY_REPEAT_WARN'], strict=app.testing)
+    return response
+
+# Unmatched URLs share one label so scanners can't blow up metric cardinality
+def metrics_endpoint():
+    return request.endpoint or 'unmatched'
+
+@app.before_request
+def track_request_start():
+    in_progress = metrics.requests_in_progress.labels(metrics_endpoint())
+    in_progress.inc()
+    request.environ['metrics.in_progress'] = in_progress
+
+@app.after_request
+def observe_request(response):
+    metrics.request_duration.labels(metrics_endpoint(), request.method, response.status_code).observe(
+        time.perf_counter() - g.request_started
+    )
+    return response
+
+@app.teardown_request
+def track_request_end(exc):
+    # Runs after a streamed response has finished, so open event streams count as in progress
+    in_progress = request.environ.pop('metrics.in_progress', None)
+    if in_progress is not None:
+        in_progress.dec()
+
+@app.before_request
+def route_database_reads():
+    g.read_replica = use_replica_for(app.view_functions.get(request.endpoint))
+
+@app.after_request
+def pin_writers_to_primary(response):
+    if g.get('committed_write'):
+        pin_to_primary(app.config['REPLICA_STICKY_SECONDS'])
+    return response
+
+storage = build_storage(app.config)
+
+letter_cache = TieredCache(
+    MemoryCache(app.config['LETTER_CACHE_MAX_BYTES']),
+    DiskCache(app.config['LETTER_CACHE_DIR'], app.config['LETTER_CACHE_DISK_MAX_BYTES'])
+    if app.config['LETTER_CACHE_DIR'] else None
+)
+
+letter_queue = JobQueue(
+    'letters',
+    max_workers=app.config['LETTER_WORKERS'],
+    max_attempts=app.config['LETTER_JOB_MAX_ATTEMPTS'],
+    depth_gauge=metrics.job_queue_depth.labels('letters')
+)
+
+status_cache = build_cache(
+    app.config['STATUS_CACHE_URL'],
+    app.config['STATUS_CACHE_MAX_BYTES'],
+    ttl=app.config['STATUS_CACHE_TTL'],
+    prefix='status:'
+)
+status_renders = SingleFlight()
+status_broker = build_broker(app.config['STATUS_EVENTS_URL'])
+status_streams = threading.BoundedSemaphore(app.config['STATUS_EVENTS_MAX_STREAMS'])
+
+preview_queue = JobQueue('previews', max_workers=app.config['PREVIEW_WORKERS'], max_attempts=2,
+                         depth_gauge=metrics.job_queue_depth.labels('previews'))
 
 # Database Models
 class Application(db.Model):
@@ -59,6 +275,49 @@ class Application(db.Model):
     reviewed_at = db.Column(db.DateTime)
     reviewed_by = db.Column(db.String(100))
     admission_letter_path = db.Column(db.String(255))
+    degree_certificate_id = db.Column(db.Integer, db.ForeignKey('document.id'))
+    id_proof_id = db.Column(db.Integer, db.ForeignKey('document.id'))
+    # Bumped by every UPDATE, including bulk Query.update()s, so clients can revalidate cheaply
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1', onupdate=sa_text('version + 1'))
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    degree_certificate_document = db.relationship('Document', foreign_keys=[degree_certificate_id])
+    id_proof_document = db.relationship('Document', foreign_keys=[id_proof_id])
+
+    # Kept in sync with migration 1 in migrations.py
+    __table_args__ = (
+        db.Index('ix_application_submitted_at_id', 'submitted_at', 'id'),
+        db.Index('ix_application_status_submitted_at', 'status', 'submitted_at'),
+        db.Index('ix_application_program_status', 'program', 'status'),
+        db.Index('ix_application_email', 'email'),
+    )
+
+class Document(db.Model):
+    """A stored file, shared by every application that uploaded identical bytes"""
+    id = db.Column(db.Integer, primary_key=True)
+    sha256 = db.Column(db.String(64), unique=True, nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    ref_count = db.Column(db.Integer, default=0, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)  # last time a submission took a reference
+
+class LetterJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    application_id = db.Column(db.Integer, db.ForeignKey('application.id'), nullable=False, index=True)
+    status = db.Column(db.String(20), default='queued')  # queued, running, done, failed
+    attempts = db.Column(db.Integer, default=0)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class UploadSession(db.Model):
+    id = db.Column(db.String(32), primary_key=True)
+    filename = db.Column(db.String(255), nullable=False)
+    length = db.Column(db.Integer, nullable=False)
+    offset = db.Column(db.Integer, default=0, nullable=False)
+    sha256 = db.Column(db.String(64))  # set once the upload is complete
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 class Admin(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -82,10 +341,19 @@ class ApplicationForm(FlaskForm):
     ], validators=[DataRequired()])
     previous_education = TextAreaField('Previous Education', validators=[DataRequired()])
     gpa = StringField('GPA (0.0-4.0)', validators=[DataRequired()])
-    degree_certificate = FileField('Degree Certificate', validators=[DataRequired()])
-    id_proof = FileField('ID Proof', validators=[DataRequired()])
+    degree_certificate = FileField('Degree Certificate')
+    id_proof = FileField('ID Proof')
+    # IDs of completed resumable uploads, used instead of sending the file bytes
+    degree_certificate_upload = HiddenField()
+    id_proof_upload = HiddenField()
     submit = SubmitField('Submit Application')
 
+    def validate_degree_certificate(self, field):
+        validate_document(field, self.degree_certificate_upload)
+
+    def validate_id_proof(self, field):
+        validate_document(field, self.id_proof_upload)
+
     def validate_gpa(self, field):
         try:
             gpa = float(field.data)
@@ -100,16 +368,292 @@ class ApplicationForm(FlaskForm):
         except ValueError:
             raise ValidationError('Date must be in YYYY-MM-DD format')
 
+def validate_document(file_field, upload_field):
+    """A document is either a file in the form or the ID of a completed resumable upload"""
+    if upload_field.data:
+        upload = db.session.get(UploadSession, upload_field.data)
+        if upload is None or upload.offset < upload.length:
+            raise ValidationError('Uploaded document is missing or incomplete. Please upload it again.')
+    elif not file_field.data:
+        raise ValidationError('This field is required.')
+
 class AdminLoginForm(FlaskForm):
     username = StringField('Username', validators=[DataRequired()])
     password = PasswordField('Password', validators=[DataRequired()])
     submit = SubmitField('Login')
 
+class BulkDecisionForm(FlaskForm):
+    action = SelectField('Action', choices=[('approve', 'Approve'), ('reject', 'Reject')], validators=[DataRequired()])
+
+# Keyset pagination helpers
+def encode_cursor(application):
+    """Encode the (submitted_at, id) sort key of a row as an opaque cursor"""
+    raw = f"{application.submitted_at.isoformat()}|{application.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a cursor back into a (submitted_at, id) tuple, raising ValueError if malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        submitted_at, row_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(submitted_at), int(row_id)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+def keyset_page(query, after=None, before=None, limit=50):
+    """Return one page of applications ordered newest first, plus next/prev cursors.
+
+    Rows are sorted by (submitted_at, id) descending. ``after`` moves to older
+    rows, ``before`` moves back to newer rows. Each call fetches at most
+    ``limit + 1`` rows no matter how large the table is.
+    """
+    if before:
+        submitted_at, row_id = decode_cursor(before)
+        rows = query.filter(or_(
+            Application.submitted_at > submitted_at,
+            and_(Application.submitted_at == submitted_at, Application.id > row_id)
+        )).order_by(Application.submitted_at.asc(), Application.id.asc()).limit(limit + 1).all()
+        has_newer = len(rows) > limit
+        rows = list(reversed(rows[:limit]))
+        prev_cursor = encode_cursor(rows[0]) if rows and has_newer else None
+        next_cursor = encode_cursor(rows[-1]) if rows else None
+        return rows, next_cursor, prev_cursor
+
+    if after:
+        submitted_at, row_id = decode_cursor(after)
+        query = query.filter(or_(
+            Application.submitted_at < submitted_at,
+            and_(Application.submitted_at == submitted_at, Application.id < row_id)
+        ))
+    rows = query.order_by(Application.submitted_at.desc(), Application.id.desc()).limit(limit + 1).all()
+    has_older = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(rows[-1]) if rows and has_older else None
+    prev_cursor = encode_cursor(rows[0]) if rows and after else None
+    return rows, next_cursor, prev_cursor
+
+def get_page_size(default_key='ADMIN_PAGE_SIZE', max_key='ADMIN_MAX_PAGE_SIZE', arg='per_page'):
+    """Read a page size from the query string, clamped to the configured maximum"""
+    page_size = request.args.get(arg, app.config[default_key], type=int)
+    return max(1, min(page_size, app.config[max_key]))
+
+def get_status_counts():
+    """Count applications per status with a single GROUP BY query"""
+    counts = {'pending': 0, 'approved': 0, 'rejected': 0}
+    rows = db.session.query(Application.status, func.count(Application.id)).group_by(Application.status).all()
+    for status, count in rows:
+        counts[status] = count
+    counts['total'] = sum(count for _, count in rows)
+    return counts
+
 # Routes
 @app.route('/')
 def index():
     return render_template('index.html')
 
+def store_document(file_storage, upload_id, application_id, kind):
+    """Store one applicant document from the form body or a completed resumable upload.
+
+    Bytes are kept once per SHA-256 in the content-addressed document store;
+    a duplicate upload only bumps the Document's reference count. Returns the
+    display filename and the Document. The Document row and a consumed upload
+    session are committed together with the application; the session's file
+    is only removed once that commit succeeds, so a rolled-back submission
+    can be retried with the same upload.
+    """
+    if upload_id:
+        upload = db.session.get(UploadSession, upload_id)
+        original, sha256, size = upload.filename, upload.sha256, upload.length
+    else:
+        stream = file_storage.stream
+        if not isinstance(stream, UploadStream):
+            # Spool non-streamed uploads to a temp file so they go through the same path
+            stream = UploadStream(app.config['UPLOAD_FOLDER'], file_storage.filename,
+                                  app.config['UPLOAD_MAX_FILE_BYTES'])
+            for chunk in iter(lambda: file_storage.stream.read(64 * 1024), b''):
+                stream.write(chunk)
+        original, sha256, size = file_storage.filename, stream.hexdigest, stream.size
+        metrics.upload_bytes.labels('form').inc(size)
+        try:
+            stream.verify()
+        except UnsupportedMediaType as e:
+            raise InvalidUpload(e.description)
+
+    # Take the Document (and its row lock) before storing bytes, so gc-documents
+    # can't delete a blob this submission has found already stored
+    document = acquire_document(sha256, size)
+    if upload_id:
+        session_path = upload_session_path(upload)
+        put_blob(storage, sha256, session_path, keep_source=True)
+        discard_after_commit(session_path)
+        db.session.delete(upload)
+    else:
+        try:
+            put_blob(storage, sha256, stream.finish())
+        finally:
+            stream.close()  # removes the spool file if it was a duplicate
+    return secure_filename(f"{application_id}_{kind}_{original}"), document
+
+def discard_after_commit(path):
+    """Delete the local file at path once the session's current transaction commits"""
+    db.session.info.setdefault('discard_after_commit', []).append(path)
+
+@event.listens_for(db.session, 'after_commit')
+def discard_committed_files(session):
+    if session.in_nested_transaction():
+        return  # a savepoint; the files go when the outer transaction commits
+    for path in session.info.pop('discard_after_commit', []):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+@event.listens_for(db.session, 'after_transaction_end')
+def keep_files_on_rollback(session, transaction):
+    if transaction.parent is None:
+        session.info.pop('discard_after_commit', None)
+
+def acquire_document(sha256, size):
+    """Get or create the Document for sha256 and take a reference to it.
+
+    The row stays locked until the caller commits, and updated_at is bumped,
+    which is what gc-documents checks before deleting an unreferenced Document.
+    """
+    document = Document.query.filter_by(sha256=sha256).with_for_update().first()
+    if document is None:
+        try:
+            with db.session.begin_nested():
+                document = Document(sha256=sha256, size=size)
+                db.session.add(document)
+        except IntegrityError:
+            # Another request stored the same bytes first
+            document = Document.query.filter_by(sha256=sha256).with_for_update().one()
+    Document.query.filter_by(id=document.id).update({
+        'ref_count': Document.ref_count + 1, 'updated_at': datetime.utcnow()
+    })
+    return document
+
+def document_key(document):
+    return blob_key(document.sha256)
+
+@app.cli.command('gc-documents')
+@click.option('--batch-size', default=1000, show_default=True, help='Documents locked and recounted per transaction')
+def gc_documents_command(batch_size):
+    """Recount document references and delete blobs no application uses.
+
+    Each batch of Documents is locked before its references are counted, so a
+    submission still reusing one of them is waited for rather than missed.
+    Unreferenced Documents touched within the last GC_GRACE_SECONDS are kept:
+    on SQLite, which has no row locks, that window is what protects them.
+    """
+    grace_cutoff = datetime.utcnow() - timedelta(seconds=app.config['GC_GRACE_SECONDS'])
+    removed = 0
+    last_id = 0
+    while True:
+        batch = Document.query.filter(Document.id > last_id).order_by(Document.id) \
+            .limit(batch_size).with_for_update().all()
+        if not batch:
+            break
+        last_id = batch[-1].id
+        ids = [document.id for document in batch]
+        referenced = {}
+        for column in (Application.degree_certificate_id, Application.id_proof_id):
+            for document_id, count in db.session.query(column, func.count()) \
+                    .filter(column.in_(ids)).group_by(column):
+                referenced[document_id] = referenced.get(document_id, 0) + count
+        for document in batch:
+            document.ref_count = referenced.get(document.id, 0)
+            touched = document.updated_at or document.created_at
+            if document.ref_count == 0 and (touched is None or touched < grace_cutoff):
+                delete_blob(storage, document.sha256)
+                storage.delete(preview_key(document.sha256, app.config['PREVIEW_WIDTH']))
+                db.session.delete(document)
+                removed += 1
+        db.session.commit()
+
+    # Blobs without a row are left alone for the grace period: a submission may be about to commit one
+    known = {sha256 for (sha256,) in db.session.query(Document.sha256)}
+    cutoff = time.time() - app.config['GC_GRACE_SECONDS']
+    for sha256 in list(iter_blobs(storage)):
+        if sha256 not in known and storage.modified_at(blob_key(sha256)) < cutoff:
+            delete_blob(storage, sha256)
+            removed += 1
+    click.echo(f"Removed {removed} unreferenced documents")
+
+def migrate_legacy_documents(batch_size=500):
+    """Move documents saved before the document store into it, in batches.
+
+    Older submissions kept each file as UPLOAD_FOLDER/<filename> with no
+    Document row; their bytes are hashed into the content-addressed store
+    and the application linked to the Document. Returns documents moved.
+    """
+    moved = 0
+    last_id = 0
+    pending = or_(Application.degree_certificate_id.is_(None), Application.id_proof_id.is_(None))
+    while True:
+        batch = Application.query.filter(pending, Application.id > last_id) \
+            .order_by(Application.id).limit(batch_size).all()
+        if not batch:
+            return moved
+        for application in batch:
+            for kind in ('degree_certificate', 'id_proof'):
+                if getattr(application, f'{kind}_id') is not None:
+                    continue
+                source = os.path.join(app.config['UPLOAD_FOLDER'], getattr(application, kind))
+                if not os.path.isfile(source):
+                    continue
+                sha256, size = file_sha256(source), os.path.getsize(source)
+                setattr(application, f'{kind}_id', acquire_document(sha256, size).id)
+                if not put_blob(storage, sha256, source):
+                    os.unlink(source)  # duplicate of a stored blob
+                moved += 1
+        db.session.commit()
+        last_id = batch[-1].id
+
+def migrate_letter_paths(batch_size=500):
+    """Rewrite admission_letter_path values that hold a filesystem path into storage keys.
+
+    Letters left in the flat upload folder are copied into non-local backends
+    on the way. Returns the number of rows rewritten.
+    """
+    rewritten = 0
+    last_id = 0
+    while True:
+        batch = Application.query.filter(Application.admission_letter_path.isnot(None), Application.id > last_id) \
+            .order_by(Application.id).limit(batch_size).all()
+        if not batch:
+            return rewritten
+        updates = []
+        for application in batch:
+            key = os.path.basename(application.admission_letter_path)
+            source = os.path.join(app.config['UPLOAD_FOLDER'], key)
+            if not storage.exists(key) and os.path.isfile(source):
+                storage.save_file(key, source)
+            if key != application.admission_letter_path:
+                updates.append({'id': application.id, 'admission_letter_path': key})
+        db.session.bulk_update_mappings(Application, updates)
+        db.session.commit()
+        rewritten += len(updates)
+        last_id = batch[-1].id
+
+@app.cli.command('migrate-storage')
+@click.option('--batch-size', type=int, default=500, help='Applications updated (and files moved) per batch')
+def migrate_storage_command(batch_size):
+    """Move files from the flat upload folder into the configured storage layout"""
+    documents = migrate_legacy_documents(batch_size)
+    click.echo(f"Moved {documents} legacy documents into the document store")
+    letters = migrate_letter_paths(batch_size)
+    click.echo(f"Rewrote {letters} admission letter paths")
+
+    if isinstance(storage, ShardedStorage):
+        moved = 0
+        for key, path in storage.legacy_files():
+            storage.adopt(key, path)
+            moved += 1
+            if moved % batch_size == 0:
+                click.echo(f"Sharded {moved} files...")
+        click.echo(f"Sharded {moved} files")
+
 @app.route('/apply', methods=['GET', 'POST'])
 def apply():
     form = ApplicationForm()
@@ -121,36 +665,28 @@ def apply():
             application_id = f"APP{datetime.now().strftime('%Y%m%d')}{str(uuid.uuid4())[:8].upper()}"
             logger.info(f"Generated application ID: {application_id}")
             
-            # Save uploaded files
+            # Save uploaded files, either sent with the form or uploaded earlier via /uploads
             degree_cert = form.degree_certificate.data
             id_proof_file = form.id_proof.data
+            degree_upload = form.degree_certificate_upload.data
+            id_upload = form.id_proof_upload.data
             
-            if not degree_cert or not id_proof_file:
+            if not (degree_cert or degree_upload) or not (id_proof_file or id_upload):
                 logger.error("Missing required files")
                 flash('Please upload both required documents.', 'error')
                 return render_template('apply.html', form=form)
             
-            logger.info(f"Degree cert filename: {degree_cert.filename}")
-            logger.info(f"ID proof filename: {id_proof_file.filename}")
-            
-            degree_filename = secure_filename(f"{application_id}_degree_{degree_cert.filename}")
-            id_filename = secure_filename(f"{application_id}_id_{id_proof_file.filename}")
-            
-            logger.info(f"Secure filenames - Degree: {degree_filename}, ID: {id_filename}")
-            
             # Save files with error handling
             try:
-                degree_path = os.path.join(app.config['UPLOAD_FOLDER'], degree_filename)
-                id_path = os.path.join(app.config['UPLOAD_FOLDER'], id_filename)
-                
-                logger.info(f"Saving degree cert to: {degree_path}")
-                logger.info(f"Saving ID proof to: {id_path}")
+                degree_filename, degree_document = store_document(degree_cert, degree_upload, application_id, 'degree')
+                id_filename, id_document = store_document(id_proof_file, id_upload, application_id, 'id')
                 
-                degree_cert.save(degree_path)
-                id_proof_file.save(id_path)
-                
-                logger.info("Files saved successfully")
+                logger.info(f"Secure filenames - Degree: {degree_filename}, ID: {id_filename}")
+                logger.info(f"Files saved successfully (sha256 degree={degree_document.sha256}, id={id_document.sha256})")
                 
+            except InvalidUpload as e:
+                flash(str(e), 'error')
+                return render_template('apply.html', form=form)
             except Exception as e:
                 logger.error(f"File save error: {str(e)}")
                 logger.error(traceback.format_exc())
@@ -171,13 +707,16 @@ def apply():
                 previous_education=form.previous_education.data,
                 gpa=float(form.gpa.data),
                 degree_certificate=degree_filename,
-                id_proof=id_filename
+                id_proof=id_filename,
+                degree_certificate_document=degree_document,
+                id_proof_document=id_document
             )
             
             logger.info("Adding application to database")
             db.session.add(application)
             db.session.commit()
             logger.info("Application saved to database successfully")
+            enqueue_previews(degree_document, id_document)
             
             flash(f'Application submitted successfully! Your application ID is: {application_id}', 'success')
             return redirect(url_for('application_status', application_id=application_id))
@@ -191,14 +730,302 @@ def apply():
     
     return render_template('apply.html', form=form)
 
+# Resumable uploads (a subset of the tus 1.0 protocol: creation, HEAD and PATCH)
+TUS_VERSION = '1.0.0'
+
+def upload_session_path(upload):
+    return os.path.join(app.config['UPLOAD_FOLDER'], f".resumable-{upload.id}")
+
+def tus_response(status, **headers):
+    response = app.response_class(status=status)
+    response.headers['Tus-Resumable'] = TUS_VERSION
+    response.headers['Cache-Control'] = 'no-store'
+    for name, value in headers.items():
+        response.headers[name.replace('_', '-')] = str(value)
+    return response
+
+@app.route('/uploads', methods=['POST'])
+def create_upload():
+    """Start a resumable upload: Upload-Length plus a filename in Upload-Metadata"""
+    length = request.headers.get('Upload-Length', type=int)
+    try:
+        filename = parse_upload_metadata(request.headers.get('Upload-Metadata')).get('filename')
+    except ValueError:
+        filename = None
+    if not length or length <= 0 or not filename:
+        return jsonify({'error': 'Upload-Length and a filename in Upload-Metadata are required'}), 400
+    if length > app.config['UPLOAD_MAX_FILE_BYTES']:
+        return jsonify({'error': f"{filename} is larger than the upload limit"}), 413
+    try:
+        check_extension(filename)
+    except UnsupportedMediaType as e:
+        return jsonify({'error': e.description}), 415
+
+    upload = UploadSession(id=uuid.uuid4().hex, filename=filename, length=length)
+    open(upload_session_path(upload), 'wb').close()
+    db.session.add(upload)
+    db.session.commit()
+    return tus_response(201, Location=url_for('upload_status', upload_id=upload.id), Upload_Offset=0)
+
+@app.route('/uploads/<upload_id>', methods=['HEAD'])
+def upload_status(upload_id):
+    """Report how many bytes of an upload the server has, so the client can resume"""
+    upload = db.session.get(UploadSession, upload_id)
+    if upload is None:
+        return tus_response(404)
+    return tus_response(200, Upload_Offset=upload.offset, Upload_Length=upload.length)
+
+@app.route('/uploads/<upload_id>', methods=['PATCH'])
+def upload_chunk(upload_id):
+    """Append the request body to an upload at the offset given by Upload-Offset"""
+    upload = db.session.get(UploadSession, upload_id)
+    if upload is None:
+        return tus_response(404)
+    if request.mimetype != 'application/offset+octet-stream':
+        return jsonify({'error': 'Content-Type must be application/offset+octet-stream'}), 415
+    if request.headers.get('Upload-Offset', type=int) != upload.offset:
+        return tus_response(409, Upload_Offset=upload.offset)
+
+    path = upload_session_path(upload)
+    started_at = upload.offset
+    try:
+        upload.offset = append_upload_chunk(path, request.stream, upload.offset, upload.length, upload.filename)
+    except UnsupportedMediaType as e:
+        os.unlink(path)
+        db.session.delete(upload)
+        db.session.commit()
+        return jsonify({'error': e.description}), 415
+    except HTTPException as e:
+        # Keep whatever arrived before the error so the client can resume from there
+        upload.offset = os.path.getsize(path)
+        upload.updated_at = datetime.utcnow()
+        db.session.commit()
+        return jsonify({'error': e.description}), e.code
+
+    metrics.upload_bytes.labels('resumable').inc(upload.offset - started_at)
+    if upload.offset == upload.length:
+        upload.sha256 = file_sha256(path)
+    upload.updated_at = datetime.utcnow()
+    db.session.commit()
+    return tus_response(204, Upload_Offset=upload.offset)
+
+@app.cli.command('purge-uploads')
+def purge_uploads_command():
+    """Delete resumable uploads older than UPLOAD_SESSION_TTL_HOURS that were never used"""
+    cutoff = datetime.utcnow() - timedelta(hours=app.config['UPLOAD_SESSION_TTL_HOURS'])
+    expired = UploadSession.query.filter(UploadSession.updated_at < cutoff).all()
+    for upload in expired:
+        try:
+            os.unlink(upload_session_path(upload))
+        except FileNotFoundError:
+            pass
+        db.session.delete(upload)
+    db.session.commit()
+    click.echo(f"Purged {len(expired)} expired uploads")
+
+# Conditional GET
+def get_application_version(criterion):
+    """Return (version, last modified) of the application matching criterion, or None, without loading the row"""
+    row = db.session.query(
+        Application.version,
+        func.coalesce(Application.updated_at, Application.reviewed_at, Application.submitted_at)
+    ).filter(criterion).first()
+    return (row[0], row[1]) if row else None
+
+def not_modified(etag, last_modified=None, weak=False):
+    """Return a 304 response if the client's copy (If-None-Match/If-Modified-Since) is current, else None"""
+    if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        return None
+    response = app.response_class(status=304)
+    response.set_etag(etag, weak=weak)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
 @app.route('/status/<application_id>')
+@read_only
+@query_budget(1)
 def application_status(application_id):
-    application = Application.query.filter_by(application_id=application_id).first()
-    if not application:
+    # Cache first, so a hit (or a 304) is answered without touching the database.
+    # status_changed drops the entry on every decision. A page reloaded by the live
+    # update asks for ?version=, which also catches a worker whose in-process cache
+    # never heard about the drop; other readers there see the change within STATUS_CACHE_TTL.
+    min_version = request.args.get('version', type=int)
+    if min_version is not None:
+        cached_entry = status_cache.get(application_id)
+        if cached_entry is not None and json.loads(cached_entry)['version'] < min_version:
+            status_cache.delete(application_id)
+    entry = status_renders.get_or_set(status_cache, application_id, lambda: render_status_card(application_id))
+    if entry is None:
         flash('Application not found!', 'error')
         return redirect(url_for('index'))
-    
-    return render_template('status.html', application=application)
+    entry = json.loads(entry)
+    version, last_modified = entry['version'], datetime.fromisoformat(entry['last_modified'])
+
+    # A page carrying a flashed message must be rendered, and must not be revalidated later
+    has_flashes = '_flashes' in session
+    etag = f"{application_id}-{version}"
+    if not has_flashes:
+        cached = not_modified(etag, last_modified, weak=True)
+        if cached is not None:
+            return cached
+
+    # The card is cached without the surrounding page, which carries per-visitor flashed messages
+    response = make_response(render_template(
+        'status.html',
+        status_card=Markup(entry['card']),
+        application_id=application_id,
+        version=version,
+        live=not entry.get('settled', False)
+    ))
+    if has_flashes:
+        response.cache_control.no_store = True
+    else:
+        response.set_etag(etag, weak=True)
+        response.last_modified = last_modified
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+    return response
+
+def render_status_card(application_id):
+    """The status cache entry: the rendered card plus the version and time its ETag is built from"""
+    application = Application.query.filter_by(application_id=application_id).first()
+    if not application:
+        return None
+    last_modified = application.updated_at or application.reviewed_at or application.submitted_at
+    return json.dumps({
+        'version': application.version,
+        'last_modified': last_modified.isoformat(),
+        'settled': is_settled(application.status, application.admission_letter_path is not None),
+        'card': render_template('status_card.html', application=application),
+    }).encode('utf-8')
+
+def status_changed(*application_ids):
+    """Drop cached status cards and notify watching applicants; call after committing a visible change"""
+    for application_id in application_ids:
+        status_cache.delete(application_id)
+        status_broker.publish(application_id, {'application_id': application_id})
+
+def is_settled(status, letter_ready):
+    """Whether an application's status page can no longer change: rejected, or approved with its letter stored"""
+    return status == 'rejected' or (status == 'approved' and letter_ready)
+
+def status_event(application_id):
+    """Current status of an application for the live channels, or None if it doesn't exist"""
+    row = db.session.query(
+        Application.status, Application.version, Application.admission_letter_path
+    ).filter_by(application_id=application_id).first()
+    db.session.close()  # don't hold a pooled connection while the client waits
+    if row is None:
+        return None
+    letter_ready = row.admission_letter_path is not None
+    return {
+        'application_id': application_id,
+        'status': row.status,
+        'version': row.version,
+        'letter_ready': letter_ready,
+        'settled': is_settled(row.status, letter_ready),
+    }
+
+def format_sse(event, data, event_id=None):
+    lines = [f"event: {event}", f"data: {json.dumps(data)}"]
+    if event_id is not None:
+        lines.insert(0, f"id: {event_id}")
+    return '\n'.join(lines) + '\n\n'
+
+def streams_busy():
+    """503 for an event stream or long-poll past this worker's STATUS_EVENTS_MAX_STREAMS"""
+    response = jsonify({'error': 'Too many live status connections; try again shortly'})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(app.config['STATUS_EVENTS_MAX_SECONDS'])
+    return response
+
+@app.route('/status/<application_id>/events')
+def application_status_events(application_id):
+    """Server-Sent Events stream of status changes for one application.
+
+    Sends a `status` event whenever the application's version differs from
+    ?version= (or the Last-Event-ID the browser resends on reconnect), with
+    comments as keepalives in between. Streams end after
+    STATUS_EVENTS_MAX_SECONDS and EventSource reconnects on its own, until
+    the client is up to date with a settled application: then the answer is
+    204, which tells EventSource to stop. Past STATUS_EVENTS_MAX_STREAMS open
+    in this worker the answer is 503, and the page falls back to long-polling.
+    """
+    since = request.args.get('version', type=int)
+    if request.headers.get('Last-Event-ID', '').isdigit():
+        since = int(request.headers['Last-Event-ID'])
+    if not status_streams.acquire(blocking=False):
+        return streams_busy()
+    # Subscribe before the first read so a change in between is not missed
+    subscription = status_broker.subscribe(application_id)
+
+    def close():
+        subscription.close()
+        status_streams.release()
+
+    current = status_event(application_id)
+    if current is None:
+        close()
+        return jsonify({'error': 'Application not found'}), 404
+    if current['settled'] and current['version'] == since:
+        close()
+        return '', 204
+
+    keepalive = app.config['STATUS_EVENTS_KEEPALIVE']
+    deadline = time.monotonic() + app.config['STATUS_EVENTS_MAX_SECONDS']
+
+    def stream():
+        yield f"retry: {keepalive * 1000}\n\n"
+        last, event = since, current
+        while True:
+            if event is not None and event['version'] != last:
+                last = event['version']
+                yield format_sse('status', event, event_id=last)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            if subscription.get(timeout=min(keepalive, remaining)) is None:
+                event = None
+                yield ": keepalive\n\n"
+            else:
+                event = status_event(application_id)
+
+    response = Response(stream_with_context(stream()), mimetype='text/event-stream')
+    response.call_on_close(close)
+    response.headers['Cache-Control'] = 'no-store'
+    response.headers['X-Accel-Buffering'] = 'no'  # stop nginx from buffering the stream
+    return response
+
+@app.route('/status/<application_id>/poll')
+def application_status_poll(application_id):
+    """Long-poll fallback: wait until the version differs from ?version=, then return the status as JSON.
+
+    Settled applications are answered at once. Shares STATUS_EVENTS_MAX_STREAMS with the event streams.
+    """
+    since = request.args.get('version', type=int)
+    if not status_streams.acquire(blocking=False):
+        return streams_busy()
+    try:
+        with status_broker.subscribe(application_id) as subscription:
+            event = status_event(application_id)
+            if event is None:
+                return jsonify({'error': 'Application not found'}), 404
+            deadline = time.monotonic() + app.config['STATUS_EVENTS_MAX_SECONDS']
+            while event['version'] == since and not event['settled']:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                if subscription.get(timeout=remaining) is not None:
+                    event = status_event(application_id)
+    finally:
+        status_streams.release()
+
+    response = jsonify(event)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
 
 @app.route('/admin/login', methods=['GET', 'POST'])
 def admin_login():
@@ -214,15 +1041,137 @@ def admin_login():
     return render_template('admin_login.html', form=form)
 
 @app.route('/admin/dashboard')
+@read_only
+@query_budget(3)
 def admin_dashboard():
-    applications = Application.query.order_by(Application.submitted_at.desc()).all()
-    return render_template('admin_dashboard.html', applications=applications)
+    page_size = get_page_size()
+    try:
+        applications, next_cursor, prev_cursor = keyset_page(
+            Application.query,
+            after=request.args.get('after'),
+            before=request.args.get('before'),
+            limit=page_size
+        )
+    except ValueError:
+        flash('Invalid page cursor.', 'error')
+        return redirect(url_for('admin_dashboard'))
+
+    return render_template(
+        'admin_dashboard.html',
+        applications=applications,
+        stats=get_status_counts(),
+        bulk_form=BulkDecisionForm(),
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
+        page_size=page_size
+    )
 
 @app.route('/admin/application/<int:app_id>')
+@read_only
+@query_budget(3)
 def admin_view_application(app_id):
     application = Application.query.get_or_404(app_id)
     return render_template('admin_view_application.html', application=application)
 
+DOCUMENT_KINDS = ('degree_certificate', 'id_proof')
+
+@app.route('/admin/application/<int:app_id>/documents/<kind>')
+@read_only
+@query_budget(2)
+def serve_document(app_id, kind):
+    """Serve an applicant document inline to reviewers.
+
+    Documents are content-addressed, so the SHA-256 doubles as a strong ETag
+    and If-None-Match/If-Range/Range are answered without reading the file
+    more than needed. With DOCUMENT_OFFLOAD set, only headers are sent and
+    the front-end server streams the bytes.
+    """
+    if kind not in DOCUMENT_KINDS:
+        abort(404)
+    application = Application.query.get_or_404(app_id)
+    document = getattr(application, f'{kind}_document')
+    if document is None:
+        abort(404)  # a legacy upload not yet moved by `flask migrate-storage`
+    key = document_key(document)
+    filename = getattr(application, kind)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    path = storage.local_path(key)
+    if path is None:
+        return redirect(storage.url(key, expires=app.config['STORAGE_URL_EXPIRES'], filename=filename))
+    if not os.path.exists(path):
+        app.logger.error(f"Document {key} for application {application.application_id} is missing")
+        abort(404)
+
+    offload = app.config['DOCUMENT_OFFLOAD']
+    if offload:
+        response = Response(mimetype=mimetype)
+        response.headers['Content-Disposition'] = f'inline; filename="{filename}"'
+        if offload == 'x-accel-redirect':
+            relative = os.path.relpath(path, app.config['STORAGE_ROOT']).replace(os.sep, '/')
+            response.headers['X-Accel-Redirect'] = app.config['DOCUMENT_ACCEL_PREFIX'].rstrip('/') + '/' + relative
+        else:
+            response.headers['X-Sendfile'] = os.path.abspath(path)
+    else:
+        response = send_file(path, mimetype=mimetype, download_name=filename, conditional=True,
+                             etag=document.sha256, max_age=app.config['DOCUMENT_MAX_AGE'])
+        response.accept_ranges = 'bytes'  # lets PDF viewers fetch pages on demand
+    response.set_etag(document.sha256)
+    response.cache_control.public = False
+    response.cache_control.private = True
+    response.cache_control.max_age = app.config['DOCUMENT_MAX_AGE']
+    return response.make_conditional(request) if offload else response
+
+# Document previews
+def enqueue_previews(*documents):
+    """Queue preview rendering for documents that don't have a current preview yet"""
+    for sha256 in {document.sha256 for document in documents}:
+        if not storage.exists(preview_key(sha256, app.config['PREVIEW_WIDTH'])):
+            preview_queue.submit(generate_preview, sha256)
+
+def generate_preview(sha256):
+    """Render and store the preview of a stored document; returns its key, or None if it can't be rendered"""
+    width = app.config['PREVIEW_WIDTH']
+    key = blob_key(sha256)
+    path = storage.local_path(key)
+    if path is not None:
+        data = render_preview(path, width)
+    else:
+        # Remote backends: fetch into a temp file, since renderers need a seekable local file
+        with tempfile.NamedTemporaryFile(dir=app.config['UPLOAD_FOLDER'], prefix='.preview-') as f:
+            with storage.open(key) as source:
+                shutil.copyfileobj(source, f)
+            f.flush()
+            data = render_preview(f.name, width)
+    if data is None:
+        return None
+    storage.save(preview_key(sha256, width), io.BytesIO(data))
+    return preview_key(sha256, width)
+
+@app.route('/admin/documents/<sha256>/preview.jpg')
+@read_only
+@query_budget(2)
+def document_preview(sha256):
+    """Serve a document's preview thumbnail.
+
+    The URL names the document's content, so the response never changes and
+    is cached by the browser for a year. A preview the background worker
+    hasn't produced yet is rendered on the spot.
+    """
+    Document.query.filter_by(sha256=sha256).first_or_404()
+    key = preview_key(sha256, app.config['PREVIEW_WIDTH'])
+    if not storage.exists(key) and generate_preview(sha256) is None:
+        return Response(status=404, headers={'Cache-Control': 'no-store'})
+
+    with storage.open(key) as f:
+        data = f.read()
+    response = Response(data, mimetype='image/jpeg')
+    response.set_etag(key.rsplit('/', 1)[-1])
+    response.cache_control.private = True
+    response.cache_control.max_age = 365 * 24 * 3600
+    response.cache_control.immutable = True
+    return response.make_conditional(request)
+
 @app.route('/admin/approve/<int:app_id>')
 def approve_application(app_id):
     application = Application.query.get_or_404(app_id)
@@ -230,11 +1179,10 @@ def approve_application(app_id):
     application.reviewed_at = datetime.utcnow()
     application.reviewed_by = 'Admin'  # In production, get from session
     
-    # Generate admission letter
-    admission_letter_path = generate_admission_letter(application)
-    application.admission_letter_path = admission_letter_path
-    
-    db.session.commit()
+    # Admission letter is generated in the background; the job commits with the decision
+    enqueue_letter_job(application)
+    status_changed(application.application_id)
+
     flash(f'Application {application.application_id} approved!', 'success')
     return redirect(url_for('admin_dashboard'))
 
@@ -246,25 +1194,110 @@ def reject_application(app_id):
     application.reviewed_by = 'Admin'  # In production, get from session
     
     db.session.commit()
+    status_changed(application.application_id)
     flash(f'Application {application.application_id} rejected!', 'success')
     return redirect(url_for('admin_dashboard'))
 
+@app.route('/admin/applications/bulk', methods=['POST'])
+def bulk_decide_applications():
+    """Approve or reject many pending applications in one transaction.
+
+    Accepts the dashboard multi-select form or a JSON body of the form
+    {"action": "approve", "ids": [1, 2, 3]}.
+    """
+    payload = None
+    if request.is_json:
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict) or not isinstance(payload.get('ids', []), list):
+            return jsonify({'error': 'Expected a JSON object {"action": ..., "ids": [...]}'}), 400
+    form = BulkDecisionForm()
+    raw_ids = payload.get('ids', []) if payload is not None else request.form.getlist('ids')
+
+    try:
+        ids = sorted({int(i) for i in raw_ids})
+    except (TypeError, ValueError):
+        ids = None
+    if not form.validate_on_submit() or not ids or len(ids) > app.config['BULK_DECISION_MAX_IDS']:
+        error = f"Select between 1 and {app.config['BULK_DECISION_MAX_IDS']} applications and a valid action."
+        if payload is not None:
+            return jsonify({'error': error, 'details': form.errors}), 400
+        flash(error, 'error')
+        return redirect(url_for('admin_dashboard'))
+
+    decided = decide_applications(ids, form.action.data, reviewer='Admin')  # In production, get from session
+
+    if payload is not None:
+        return jsonify({'action': form.action.data, 'updated': len(decided), 'ids': decided})
+    verb = 'approved' if form.action.data == 'approve' else 'rejected'
+    flash(f'{len(decided)} application(s) {verb}!', 'success')
+    return redirect(url_for('admin_dashboard'))
+
+def decide_applications(ids, action, reviewer):
+    """Apply one decision to every pending application in ids with a single UPDATE.
+
+    Letter jobs for approvals are inserted in the same transaction and fanned
+    out to the letter queue after commit. Returns the ids actually decided:
+    the rows the UPDATE itself changed, so an application decided by someone
+    else in the meantime gets neither a second decision nor a letter job.
+    """
+    pending = (Application.id.in_(ids), Application.status == 'pending')
+    statement = sa_update(Application).where(*pending).values(
+        status='approved' if action == 'approve' else 'rejected',
+        reviewed_at=datetime.utcnow(),
+        reviewed_by=reviewer
+    ).execution_options(synchronize_session=False)
+    if db.engine.dialect.update_returning:
+        rows = db.session.execute(statement.returning(Application.id, Application.application_id)).all()
+    else:
+        # Without UPDATE ... RETURNING, lock the pending rows so the UPDATE changes exactly these
+        rows = Application.query.filter(*pending).with_entities(Application.id, Application.application_id) \
+            .with_for_update().all()
+        db.session.execute(statement)
+    decided = sorted(row.id for row in rows)
+    if not decided:
+        return []
+
+    jobs = []
+    if action == 'approve':
+        jobs = [LetterJob(application_id=app_id) for app_id in decided]
+        db.session.add_all(jobs)
+    db.session.commit()
+    status_changed(*(row.application_id for row in rows))
+
+    for job in jobs:
+        letter_queue.submit(run_letter_job, job.id)
+    logger.info(f"Bulk {action}: {len(decided)} applications")
+    return decided
+
 @app.route('/download_letter/<int:app_id>')
 def download_admission_letter(app_id):
     try:
         application = Application.query.get_or_404(app_id)
-        if application.status != 'approved' or not application.admission_letter_path:
+        if application.status != 'approved':
             flash('Admission letter not available!', 'error')
             return redirect(url_for('application_status', application_id=application.application_id))
-        
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], application.admission_letter_path)
-        
-        if not os.path.exists(file_path):
-            flash('Admission letter file not found!', 'error')
+
+        # Remote storage hands out a short-lived presigned URL instead of streaming through the worker
+        key = application.admission_letter_path
+        if key and app.config['STORAGE_BACKEND'] == 's3' and storage.exists(key):
+            return redirect(storage.url(
+                key,
+                expires=app.config['STORAGE_URL_EXPIRES'],
+                filename=f'admission_letter_{application.application_id}.pdf'
+            ))
+
+        data = get_admission_letter(application)
+        if data is None:
+            job = LetterJob.query.filter_by(application_id=application.id).order_by(LetterJob.id.desc()).first()
+            # A finished job with no letter means the stored file was lost, so render it again
+            if job is None or job.status == 'done' or is_letter_job_stale(job):
+                enqueue_letter_job(application)
+            flash('Your admission letter is being prepared. Please check back in a moment.', 'info')
             return redirect(url_for('application_status', application_id=application.application_id))
-        
+
         return send_file(
-            file_path,
+            io.BytesIO(data),
+            mimetype='application/pdf',
             as_attachment=True,
             download_name=f'admission_letter_{application.application_id}.pdf'
         )
@@ -273,92 +1306,134 @@ def download_admission_letter(app_id):
         flash('Error downloading admission letter. Please try again.', 'error')
         return redirect(url_for('application_status', application_id=application.application_id))
 
+def letter_cache_key(application):
+    return f"{application.id}:{LETTER_TEMPLATE_VERSION}"
+
+def get_admission_letter(application):
+    """Return the letter PDF bytes from the cache, the stored file, or a fresh in-memory render.
+
+    Returns None when the letter is not ready and on-demand rendering is disabled.
+    """
+    key = letter_cache_key(application)
+    data = letter_cache.get(key)
+    if data is not None:
+        return data
+
+    if application.admission_letter_path:
+        try:
+            with storage.open(application.admission_letter_path) as f:
+                data = f.read()
+        except FileNotFoundError:
+            pass
+
+    if data is None and app.config['LETTER_RENDER_ON_DEMAND']:
+        with metrics.letter_render_duration.labels('on_demand').time():
+            data = render_admission_letter(letter_fields(application))
+
+    if data is not None:
+        letter_cache.set(key, data)
+    return data
+
+# Background letter jobs
+def enqueue_letter_job(application):
+    """Record a letter job for an application and hand it to the letter queue"""
+    job = LetterJob(application_id=application.id)
+    db.session.add(job)
+    db.session.commit()
+    letter_queue.submit(run_letter_job, job.id)
+    return job
+
+def is_letter_job_stale(job):
+    """A failed job, or one stuck queued/running (e.g. its worker died), should be requeued"""
+    if job.status == 'failed':
+        return True
+    if job.status in ('queued', 'running'):
+        age = (datetime.utcnow() - job.updated_at).total_seconds()
+        return age > app.config['LETTER_JOB_STALE_SECONDS']
+    return False
+
+def run_letter_job(job_id):
+    """Render the admission letter for a job; raises so the queue can retry"""
+    with app.app_context():
+        job = db.session.get(LetterJob, job_id)
+        if job is None or job.status == 'done':
+            return
+        job.status = 'running'
+        job.attempts += 1
+        job.updated_at = datetime.utcnow()
+        db.session.commit()
+
+        try:
+            application = db.session.get(Application, job.application_id)
+            application.admission_letter_path = generate_admission_letter(application)
+            job.status = 'done'
+            job.error = None
+        except Exception as e:
+            db.session.rollback()
+            job.status = 'failed' if job.attempts >= letter_queue.max_attempts else 'queued'
+            job.error = str(e)
+            raise
+        finally:
+            job.updated_at = datetime.utcnow()
+            db.session.commit()
+        status_changed(application.application_id)  # the card now offers the download
+
 def generate_admission_letter(application):
-    """Generate PDF admission letter for approved application"""
-    filename = f"admission_letter_{application.application_id}.pdf"
-    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    
-    doc = SimpleDocTemplate(filepath, pagesize=letter)
-    styles = getSampleStyleSheet()
-    story = []
-    
-    # Title
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        spaceAfter=30,
-        alignment=1  # Center alignment
-    )
-    title = Paragraph("ADMISSION LETTER", title_style)
-    story.append(title)
-    story.append(Spacer(1, 20))
-    
-    # Date
-    date_style = ParagraphStyle(
-        'DateStyle',
-        parent=styles['Normal'],
-        fontSize=12,
-        spaceAfter=20
-    )
-    date_text = f"Date: {datetime.now().strftime('%B %d, %Y')}"
-    story.append(Paragraph(date_text, date_style))
-    story.append(Spacer(1, 20))
-    
-    # Student Information
-    student_info = [
-        ['Application ID:', application.application_id],
-        ['Student Name:', f"{application.first_name} {application.last_name}"],
-        ['Email:', application.email],
-        ['Phone:', application.phone],
-        ['Program:', application.program.replace('_', ' ').title()],
-        ['GPA:', str(application.gpa)]
-    ]
-    
-    table = Table(student_info, colWidths=[2*inch, 4*inch])
-    table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    story.append(table)
-    story.append(Spacer(1, 30))
-    
-    # Admission Letter Content
-    content_style = ParagraphStyle(
-        'ContentStyle',
-        parent=styles['Normal'],
-        fontSize=12,
-        spaceAfter=12,
-        alignment=0  # Left alignment
-    )
-    
-    content = f"""
-    Dear {application.first_name} {application.last_name},
-    
-    We are pleased to inform you that your application for admission to our {application.program.replace('_', ' ').title()} program has been approved. 
-    Your application ID is {application.application_id}.
-    
-    Based on your academic background and qualifications, we are confident that you will be a valuable addition to our institution.
-    
-    Please note the following important information:
-    • Your application has been reviewed and approved by our admissions committee
-    • You will receive further instructions regarding enrollment procedures
-    • Please keep this admission letter for your records
-    
-    We look forward to welcoming you to our institution and wish you success in your academic journey.
-    
-    Best regards,
-    Admissions Committee
+    """Generate PDF admission letter for approved application and return its storage key"""
+    key = letter_filename(application.application_id)
+    with metrics.letter_render_duration.labels('job').time():
+        data = render_admission_letter(letter_fields(application))
+    storage.save(key, io.BytesIO(data))
+    letter_cache.set(letter_cache_key(application), data)
+    return key
+
+def render_letters_batch(query, workers=None, chunk_size=500):
+    """Render letters for every application in query across a process pool.
+
+    Applications are fetched in keyset batches of chunk_size (by id, so each
+    commit ends a finished query rather than an open server-side cursor);
+    each batch is rendered in parallel and its admission_letter_path values
+    are written back at once. Returns (letters rendered, elapsed seconds).
     """
-    
-    story.append(Paragraph(content, content_style))
-    
-    doc.build(story)
-    return filepath
+    started = time.perf_counter()
+    rendered = 0
+    # Worker processes build their own storage backend from plain config values
+    storage_config = {k: app.config[k] for k in STORAGE_CONFIG_KEYS}
+    if storage_config['STORAGE_ROOT']:
+        storage_config['STORAGE_ROOT'] = os.path.abspath(storage_config['STORAGE_ROOT'])
+
+    def flush(chunk, executor):
+        results = dict(executor.map(render_letter_to_file, [(letter_fields(a), storage_config) for a in chunk]))
+        db.session.bulk_update_mappings(Application, [
+            {'id': a.id, 'admission_letter_path': results[a.application_id]} for a in chunk
+        ])
+        db.session.commit()
+        status_changed(*(a.application_id for a in chunk))
+        return len(results)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        last_id = 0
+        while True:
+            chunk = query.filter(Application.id > last_id).order_by(Application.id).limit(chunk_size).all()
+            if not chunk:
+                break
+            rendered += flush(chunk, executor)
+            last_id = chunk[-1].id
+
+    return rendered, time.perf_counter() - started
+
+@app.cli.command('render-letters')
+@click.option('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+@click.option('--chunk-size', type=int, default=500, help='Applications fetched and rendered per batch')
+@click.option('--missing-only', is_flag=True, help='Only render letters that have never been generated')
+def render_letters_command(workers, chunk_size, missing_only):
+    """Regenerate admission letters for approved applications in parallel"""
+    query = Application.query.filter_by(status='approved')
+    if missing_only:
+        query = query.filter(Application.admission_letter_path.is_(None))
+    rendered, elapsed = render_letters_batch(query, workers=workers, chunk_size=chunk_size)
+    rate = rendered / elapsed if elapsed else 0
+    click.echo(f"Rendered {rendered} letters in {elapsed:.1f}s ({rate:.1f} letters/sec)")
 
 # Global error handler
 @app.errorhandler(500)
@@ -368,6 +1443,26 @@ def internal_error(error):
     flash('An internal server error occurred. Please try again.', 'error')
     return redirect(url_for('index'))
 
+def wants_json_error():
+    """Whether an error should be reported as JSON rather than flashed on a redirect back to the form"""
+    return request.is_json or request.path.startswith(('/api/', '/uploads'))
+
+@app.errorhandler(413)
+def request_entity_too_large(error):
+    message = error.description or 'Uploaded file is too large.'
+    if wants_json_error():
+        return jsonify({'error': message}), 413
+    flash(message, 'error')
+    return redirect(request.url)
+
+@app.errorhandler(415)
+def unsupported_media_type(error):
+    message = error.description or 'Unsupported file type.'
+    if wants_json_error():
+        return jsonify({'error': message}), 415
+    flash(message, 'error')
+    return redirect(request.url)
+
 @app.errorhandler(404)
 def not_found_error(error):
     flash('Page not found.', 'error')
@@ -435,36 +1530,220 @@ def debug_info():
         'upload_folder': app.config['UPLOAD_FOLDER'],
         'upload_folder_exists': os.path.exists(app.config['UPLOAD_FOLDER']),
         'upload_folder_writable': os.access(app.config['UPLOAD_FOLDER'], os.W_OK),
+        'storage_backend': app.config['STORAGE_BACKEND'],
         'database_url': app.config['SQLALCHEMY_DATABASE_URI'],
         'render_environment': os.environ.get('RENDER', 'False'),
         'temp_dir': tempfile.gettempdir(),
         'temp_dir_writable': os.access(tempfile.gettempdir(), os.W_OK)
     }
+    if db.engine.dialect.name == 'sqlite':
+        with db.engine.connect() as connection:
+            info['sqlite_pragmas'] = read_pragmas(connection, ['journal_mode', 'synchronous', 'busy_timeout'])
+    info['db_pool'] = pool_metrics.snapshot(db.engine)
     return jsonify(info)
 
+@app.route('/metrics')
+def prometheus_metrics():
+    body, content_type = metrics.render()
+    return Response(body, content_type=content_type)
+
 # Health check endpoint for Render
 @app.route('/health')
 def health_check():
     return jsonify({'status': 'healthy', 'timestamp': datetime.utcnow().isoformat()})
 
 # API Routes for testing
+# Fields /api/applications can project with ?fields=
+API_FIELDS = (
+    'id', 'application_id', 'first_name', 'last_name', 'email', 'phone',
+    'date_of_birth', 'address', 'program', 'previous_education', 'gpa',
+    'status', 'submitted_at', 'reviewed_at', 'reviewed_by'
+)
+API_DEFAULT_FIELDS = ('id', 'application_id', 'first_name', 'last_name', 'email', 'status', 'submitted_at')
+
+def serialize_application(application, fields):
+    """Serialize the requested fields of an application to JSON-safe values"""
+    data = {}
+    for field in fields:
+        value = getattr(application, field)
+        data[field] = value.isoformat() if hasattr(value, 'isoformat') else value
+    return data
+
+def parse_api_fields():
+    """Parse ?fields= into a tuple of allowed column names, raising ValueError on unknown fields"""
+    raw = request.args.get('fields')
+    if not raw:
+        return API_DEFAULT_FIELDS
+    fields = tuple(dict.fromkeys(f.strip() for f in raw.split(',') if f.strip()))
+    unknown = [f for f in fields if f not in API_FIELDS]
+    if unknown or not fields:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+def filter_applications(query):
+    """Apply status, program and submitted date range filters from the query string"""
+    if request.args.get('status'):
+        query = query.filter(Application.status == request.args['status'])
+    if request.args.get('program'):
+        query = query.filter(Application.program == request.args['program'])
+    if request.args.get('submitted_from'):
+        query = query.filter(Application.submitted_at >= datetime.fromisoformat(request.args['submitted_from']))
+    if request.args.get('submitted_to'):
+        query = query.filter(Application.submitted_at < datetime.fromisoformat(request.args['submitted_to']))
+    return query
+
+def page_etag(applications, fields, next_cursor):
+    """ETag for a page of applications: changes when any row on it is added, removed or updated"""
+    digest = hashlib.sha1(','.join(fields).encode())
+    for application in applications:
+        digest.update(f"|{application.id}:{application.version}".encode())
+    digest.update(f"|{next_cursor}".encode())
+    return digest.hexdigest()
+
 @app.route('/api/applications', methods=['GET'])
+@read_only
+@query_budget(2)
 def api_get_applications():
-    applications = Application.query.all()
-    return jsonify([{
-        'id': app.id,
-        'application_id': app.application_id,
-        'first_name': app.first_name,
-        'last_name': app.last_name,
-        'email': app.email,
-        'status': app.status,
-        'submitted_at': app.submitted_at.isoformat() if app.submitted_at else None
-    } for app in applications])
+    """List applications newest first, one bounded page per request.
+
+    The body stays a JSON list; the cursor for the next page is returned in
+    the X-Next-Cursor header and a Link: rel="next" header.
+    """
+    try:
+        fields = parse_api_fields()
+        page = dict(after=request.args.get('cursor'), limit=get_page_size('API_PAGE_SIZE', 'API_MAX_PAGE_SIZE', 'limit'))
+        # Cheap pass first: the page's ids and row versions identify its content
+        versions, next_cursor, _ = keyset_page(filter_applications(Application.query.options(
+            load_only(Application.id, Application.submitted_at, Application.version, Application.updated_at)
+        )), **page)
+        etag = page_etag(versions, fields, next_cursor)
+        last_modified = max((a.updated_at or a.submitted_at for a in versions if a.updated_at or a.submitted_at), default=None)
+        cached = not_modified(etag, last_modified)
+        if cached is not None:
+            return cached
+
+        # id and submitted_at are always loaded because the cursor is built from them
+        columns = [getattr(Application, f) for f in dict.fromkeys(fields + ('id', 'submitted_at'))]
+        query = filter_applications(Application.query.options(load_only(*columns)))
+        applications, next_cursor, _ = keyset_page(query, **page)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    response = jsonify([serialize_application(a, fields) for a in applications])
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    if next_cursor:
+        args = request.args.to_dict()
+        args['cursor'] = next_cursor
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = f'<{url_for("api_get_applications", _external=True, **args)}>; rel="next"'
+    return response
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+def export_lines(query, fields, fmt):
+    """Yield one serialized line per application, fetched in server-side batches"""
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        yield buffer.getvalue()  # the header goes out before the first batch is fetched
+        buffer.seek(0)
+        buffer.truncate()
+        for application in query.yield_per(app.config['EXPORT_BATCH_SIZE']):
+            writer.writerow(serialize_application(application, fields).values())
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+    else:
+        for application in query.yield_per(app.config['EXPORT_BATCH_SIZE']):
+            yield json.dumps(serialize_application(application, fields)) + '\n'
+
+def chunk_lines(lines, chunk_size=EXPORT_CHUNK_SIZE):
+    """Group small lines into byte chunks of roughly chunk_size.
+
+    The first line (the CSV header) is sent on its own so the response
+    starts straight away rather than after the first chunk_size of rows.
+    """
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is not None:
+        yield first.encode('utf-8')
+    buffer, size = [], 0
+    for line in lines:
+        data = line.encode('utf-8')
+        buffer.append(data)
+        size += len(data)
+        if size >= chunk_size:
+            yield b''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+def gzip_chunks(chunks, flush_every=8):
+    """Compress a stream of byte chunks into a single gzip member on the fly.
+
+    zlib holds output back until its window fills, so the first chunk and
+    every flush_every-th after it are sync-flushed to get bytes to the client.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for i, chunk in enumerate(chunks):
+        data = compressor.compress(chunk)
+        if i % flush_every == 0:
+            data += compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+@app.route('/api/applications/export', methods=['GET'])
+@read_only
+def api_export_applications():
+    """Stream every matching application as NDJSON or CSV.
+
+    Rows are read with yield_per so memory stays flat regardless of table
+    size. The body is gzip-compressed on the fly when the client accepts it.
+    """
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f"Unsupported format: {fmt}"}), 400
+    try:
+        fields = parse_api_fields() if request.args.get('fields') else API_FIELDS
+        columns = [getattr(Application, f) for f in dict.fromkeys(fields + ('id',))]
+        query = filter_applications(Application.query.options(load_only(*columns))).order_by(Application.id)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    body = chunk_lines(export_lines(query, fields, fmt))
+    headers = {
+        'Content-Disposition': f'attachment; filename=applications.{fmt}',
+        'Vary': 'Accept-Encoding',
+    }
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        body = gzip_chunks(body)
+        headers['Content-Encoding'] = 'gzip'
+    return Response(stream_with_context(body), mimetype=EXPORT_FORMATS[fmt], headers=headers)
 
 @app.route('/api/applications/<int:app_id>', methods=['GET'])
+@read_only
+@query_budget(2)
 def api_get_application(app_id):
+    version = get_application_version(Application.id == app_id)
+    if version is not None:
+        etag = f"{app_id}-{version[0]}"
+        cached = not_modified(etag, version[1])
+        if cached is not None:
+            return cached
+
     application = Application.query.get_or_404(app_id)
-    return jsonify({
+    response = jsonify({
         'id': application.id,
         'application_id': application.application_id,
         'first_name': application.first_name,
@@ -479,24 +1758,30 @@ def api_get_application(app_id):
         'status': application.status,
         'submitted_at': application.submitted_at.isoformat() if application.submitted_at else None
     })
+    response.set_etag(f"{application.id}-{application.version}")
+    response.last_modified = version[1]
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
 
 # Initialize database tables
 def init_db():
     with app.app_context():
-        # Handle database URL for Render
+        # Render's postgres:// DATABASE_URL is normalised where SQLALCHEMY_DATABASE_URI is set,
+        # since the engine is created from it when the app is configured
         if os.environ.get('DATABASE_URL'):
-            # Render provides DATABASE_URL, but SQLAlchemy expects it to start with postgresql://
-            # Convert postgres:// to postgresql://
-            database_url = os.environ.get('DATABASE_URL')
-            if database_url.startswith('postgres://'):
-                database_url = database_url.replace('postgres://', 'postgresql://', 1)
-            app.config['SQLALCHEMY_DATABASE_URI'] = database_url
-            logger.info(f"Using Render database: {database_url}")
+            logger.info(f"Using Render database: {db.engine.url.render_as_string(hide_password=True)}")
         else:
             logger.info(f"Using local database: {app.config['SQLALCHEMY_DATABASE_URI']}")
+        options = app.config['SQLALCHEMY_ENGINE_OPTIONS']
+        if 'pool_size' in options:
+            logger.info(f"Connection pool per worker: size={options['pool_size']} overflow={options['max_overflow']} "
+                        f"({app.config['GUNICORN_WORKERS']} workers, {app.config['DB_MAX_CONNECTIONS']} connections max)")
         
         db.create_all()
         logger.info("Database tables created successfully")
+
+        run_migrations(db.engine)
         
         # Create default admin user if not exists
         if not Admin.query.filter_by(username='admin').first():
@@ -510,6 +1795,17 @@ def init_db():
 # Call init_db when the app starts
 init_db()
 
+# With `gunicorn --preload` the workers are forked after init_db used the pool;
+# give each child fresh pools (primary and replica) rather than sharing the parent's sockets
+with app.app_context():
+    forked_engines = list(db.engines.values())
+
+def dispose_forked_engines():
+    for engine in forked_engines:
+        engine.dispose(close=False)
+
+os.register_at_fork(after_in_child=dispose_forked_engines)
+
 if __name__ == '__main__':
     # For local development
     port = int(os.environ.get('PORT', 5000))
@@ -0,0 +1,125 @@
+"""Benchmark Application queries with and without the migration 1 indexes.
+
+Builds a throwaway SQLite database with N synthetic applications, prints the
+query plan and median latency of the hot dashboard/API queries before and
+after running the migrations.
+
+Usage:
+    python benchmarks/bench_indexes.py --rows 100000 --rows 1000000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert, text
+
+PROGRAMS = ['computer_science', 'engineering', 'business', 'arts', 'science']
+STATUSES = ['pending', 'pending', 'pending', 'approved', 'rejected']
+
+QUERIES = {
+    'dashboard first page': (
+        "SELECT * FROM application ORDER BY submitted_at DESC, id DESC LIMIT 51", {}
+    ),
+    'dashboard deep page': (
+        "SELECT * FROM application WHERE submitted_at < :ts "
+        "ORDER BY submitted_at DESC, id DESC LIMIT 51", {'ts': datetime(2023, 6, 1)}
+    ),
+    'pending by date': (
+        "SELECT * FROM application WHERE status = 'pending' "
+        "ORDER BY submitted_at DESC LIMIT 51", {}
+    ),
+    'program + status count': (
+        "SELECT COUNT(*) FROM application WHERE program = 'engineering' AND status = 'approved'", {}
+    ),
+    'email lookup': (
+        "SELECT * FROM application WHERE email = :email", {'email': 'student500@example.com'}
+    ),
+}
+
+INDEXES = [
+    'ix_application_submitted_at_id',
+    'ix_application_status_submitted_at',
+    'ix_application_program_status',
+    'ix_application_email',
+]
+
+def populate(engine, rows, batch_size=10000):
+    from app import Application, db
+
+    db.metadata.create_all(engine, tables=[Application.__table__])
+    with engine.begin() as connection:
+        for name in INDEXES:
+            connection.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+    start = datetime(2023, 1, 1)
+    rng = random.Random(42)
+    for offset in range(0, rows, batch_size):
+        batch = []
+        for i in range(offset, min(offset + batch_size, rows)):
+            batch.append({
+                'application_id': f"BENCH{i:09d}",
+                'first_name': 'Bench',
+                'last_name': f"Student{i}",
+                'email': f"student{i}@example.com",
+                'phone': '1234567890',
+                'date_of_birth': datetime(2000, 1, 1).date(),
+                'address': 'Benchmark Address',
+                'program': rng.choice(PROGRAMS),
+                'previous_education': 'Benchmark Education',
+                'gpa': round(rng.uniform(2.0, 4.0), 2),
+                'degree_certificate': 'degree.pdf',
+                'id_proof': 'id.pdf',
+                'status': rng.choice(STATUSES),
+                'submitted_at': start + timedelta(seconds=rng.randint(0, 365 * 24 * 3600)),
+            })
+        with engine.begin() as connection:
+            connection.execute(insert(Application.__table__), batch)
+
+def measure(engine, repeat):
+    results = {}
+    with engine.connect() as connection:
+        for name, (sql, params) in QUERIES.items():
+            plan = connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params).fetchall()
+            timings = []
+            for _ in range(repeat):
+                began = time.perf_counter()
+                connection.execute(text(sql), params).fetchall()
+                timings.append((time.perf_counter() - began) * 1000)
+            results[name] = (statistics.median(timings), [row[-1] for row in plan])
+    return results
+
+def report(label, results):
+    print(f"\n  {label}")
+    for name, (median_ms, plan) in results.items():
+        print(f"    {name:<24} {median_ms:9.2f} ms   plan: {' / '.join(plan)}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, action='append', help='Row counts to benchmark (repeatable)')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per query')
+    args = parser.parse_args()
+
+    from migrations import run_migrations
+
+    for rows in args.rows or [100000, 1000000]:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+            print(f"\n=== {rows:,} applications ===")
+            began = time.perf_counter()
+            populate(engine, rows)
+            print(f"  populated in {time.perf_counter() - began:.1f}s")
+
+            report('without indexes', measure(engine, args.repeat))
+            run_migrations(engine)
+            report('with migration 1 indexes', measure(engine, args.repeat))
+            engine.dispose()
+
+if __name__ == '__main__':
+    main()
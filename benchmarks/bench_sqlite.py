@@ -0,0 +1,107 @@
+"""Benchmark concurrent application submissions against SQLite, default vs tuned.
+
+Starts N worker processes (standing in for gunicorn workers) that each commit
+submissions the way ``apply`` does - look up the document, insert it, insert
+the application - against one throwaway database file. Prints submissions/sec,
+commit latency and "database is locked" failures with SQLite's defaults and
+with the profile from sqlite_profile.py.
+
+Usage:
+    python benchmarks/bench_sqlite.py --workers 1 --workers 4 --workers 8 --submissions 200
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.exc import OperationalError
+
+def make_engine(path, tuned):
+    from app import app
+    from sqlite_profile import apply_sqlite_profile, sqlite_pragmas
+
+    engine = create_engine(f"sqlite:///{path}")
+    if tuned:
+        apply_sqlite_profile(engine, sqlite_pragmas(app.config))
+    return engine
+
+def submit(connection, tables, worker, i):
+    application, document = tables
+    sha256 = uuid.uuid4().hex * 2
+    connection.execute(select(document.c.id).where(document.c.sha256 == sha256)).first()
+    document_id = connection.execute(
+        insert(document).values(sha256=sha256, size=1024, ref_count=1, created_at=datetime.utcnow())
+    ).inserted_primary_key[0]
+    connection.execute(insert(application).values(
+        application_id=f"B{worker:03d}{i:08d}",
+        first_name='Bench', last_name='Student', email=f"bench{worker}-{i}@example.com",
+        phone='1234567890', date_of_birth=datetime(2000, 1, 1).date(), address='Benchmark Address',
+        program='engineering', previous_education='Benchmark Education', gpa=3.5,
+        degree_certificate='degree.pdf', id_proof='id.pdf', status='pending',
+        submitted_at=datetime.utcnow(), degree_certificate_id=document_id, id_proof_id=document_id,
+    ))
+
+def worker_main(args):
+    path, tuned, worker, submissions, start_at = args
+    from app import Application, Document
+
+    engine = make_engine(path, tuned)
+    tables = (Application.__table__, Document.__table__)
+    latencies, errors = [], 0
+    while time.time() < start_at:
+        time.sleep(0.001)
+    for i in range(submissions):
+        began = time.perf_counter()
+        try:
+            with engine.begin() as connection:
+                submit(connection, tables, worker, i)
+            latencies.append((time.perf_counter() - began) * 1000)
+        except OperationalError as e:
+            if 'locked' not in str(e):
+                raise
+            errors += 1
+    engine.dispose()
+    return latencies, errors
+
+def run(workers, submissions, tuned):
+    from app import Application, Document, db
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        engine = make_engine(path, tuned)
+        db.metadata.create_all(engine, tables=[Document.__table__, Application.__table__])
+        engine.dispose()
+
+        start_at = time.time() + 0.5  # let every process get ready so they really contend
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.map(worker_main, [(path, tuned, w, submissions, start_at) for w in range(workers)])
+        elapsed = time.time() - start_at
+
+    latencies = sorted(ms for worker_latencies, _ in results for ms in worker_latencies)
+    errors = sum(e for _, e in results)
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0
+    median = statistics.median(latencies) if latencies else 0
+    print(f"    {'tuned' if tuned else 'default':<8} {len(latencies) / elapsed:9.1f} submissions/sec"
+          f"   median {median:7.2f} ms   p95 {p95:8.2f} ms   locked errors {errors}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, action='append', help='Worker process counts (repeatable)')
+    parser.add_argument('--submissions', type=int, default=200, help='Submissions per worker')
+    args = parser.parse_args()
+
+    for workers in args.workers or [1, 4, 8]:
+        print(f"\n=== {workers} workers x {args.submissions} submissions ===")
+        run(workers, args.submissions, tuned=False)
+        run(workers, args.submissions, tuned=True)
+
+if __name__ == '__main__':
+    main()
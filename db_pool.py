@@ -0,0 +1,183 @@
+"""Database connection pool configuration and metrics.
+
+Every gunicorn worker is a separate process with its own SQLAlchemy pool, so
+the connections the app can open add up to workers x (pool_size + overflow).
+``engine_options`` sizes each worker's pool from a total connection budget
+(DB_MAX_CONNECTIONS) and the worker count gunicorn is started with, so that
+adding workers never pushes Postgres past max_connections.
+
+With PGBOUNCER_MODE=transaction, PgBouncer does the pooling: the app opens a
+connection per checkout (NullPool) and avoids server-side prepared
+statements, which don't survive transaction pooling.
+
+``PoolMetrics`` counts checkouts, connects, invalidations, time spent
+waiting for a connection and time connections are held, per process.
+"""
+import os
+import shlex
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import NullPool, QueuePool
+
+def normalize_database_url(url):
+    """Render/Heroku hand out postgres:// URLs; SQLAlchemy only accepts postgresql://"""
+    if url.startswith('postgres://'):
+        return url.replace('postgres://', 'postgresql://', 1)
+    return url
+
+def gunicorn_setting(environ, env_name, flags, default):
+    """Read an integer gunicorn setting from its env var or from GUNICORN_CMD_ARGS"""
+    if environ.get(env_name):
+        return int(environ[env_name])
+    args = shlex.split(environ.get('GUNICORN_CMD_ARGS', ''))
+    for i, arg in enumerate(args):
+        for flag in flags:
+            if arg == flag and i + 1 < len(args):
+                return int(args[i + 1])
+            if arg.startswith(flag + '='):
+                return int(arg.split('=', 1)[1])
+    return default
+
+def gunicorn_workers(environ=os.environ):
+    # gunicorn itself reads WEB_CONCURRENCY as the default --workers
+    return gunicorn_setting(environ, 'WEB_CONCURRENCY', ('--workers', '-w'), 1)
+
+def gunicorn_threads(environ=os.environ):
+    return gunicorn_setting(environ, 'GUNICORN_THREADS', ('--threads',), 1)
+
+def pool_sizing(max_connections, workers, threads, background_threads=0):
+    """Split a connection budget across workers: returns (pool_size, max_overflow) per worker.
+
+    The steady pool covers the worker's request threads plus its background
+    job threads; whatever is left of the worker's share becomes overflow for bursts.
+    """
+    per_worker = max(1, max_connections // max(1, workers))
+    pool_size = max(1, min(per_worker, threads + background_threads))
+    return pool_size, per_worker - pool_size
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.connects = 0
+            self.invalidations = 0
+            self.timeouts = 0
+            self.checked_out = 0
+            self.peak_checked_out = 0
+            self.wait_seconds = 0.0
+            self.max_wait_seconds = 0.0
+            self.held_seconds = 0.0
+            self.max_held_seconds = 0.0
+
+    def install(self, engine):
+        event.listen(engine, 'connect', self._on_connect)
+        event.listen(engine, 'checkout', self._on_checkout)
+        event.listen(engine, 'checkin', self._on_checkin)
+        event.listen(engine, 'invalidate', self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        connection_record.info['checked_out_at'] = time.perf_counter()
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        started = connection_record.info.pop('checked_out_at', None)
+        if started is None:
+            return
+        held = time.perf_counter() - started
+        with self._lock:
+            self.checked_out -= 1
+            self.held_seconds += held
+            self.max_held_seconds = max(self.max_held_seconds, held)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def record_wait(self, seconds, timed_out=False):
+        with self._lock:
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def snapshot(self, engine=None):
+        with self._lock:
+            stats = {
+                'checkouts': self.checkouts,
+                'connects': self.connects,
+                'invalidations': self.invalidations,
+                'timeouts': self.timeouts,
+                'checked_out': self.checked_out,
+                'peak_checked_out': self.peak_checked_out,
+                'wait_seconds_total': round(self.wait_seconds, 6),
+                'wait_seconds_max': round(self.max_wait_seconds, 6),
+                'held_seconds_total': round(self.held_seconds, 6),
+                'held_seconds_max': round(self.max_held_seconds, 6),
+            }
+        if engine is not None:
+            pool = engine.pool
+            stats['pool_class'] = type(pool).__name__
+            if isinstance(pool, QueuePool):
+                stats['pool_size'] = pool.size()
+                stats['pool_idle'] = pool.checkedin()
+                stats['pool_overflow'] = max(0, pool.overflow())  # negative while the pool is still filling
+        return stats
+
+def metered_queue_pool(metrics):
+    """A QueuePool subclass that reports checkout wait time to metrics"""
+    class MeteredQueuePool(QueuePool):
+        def connect(self):
+            started = time.perf_counter()
+            try:
+                connection = super().connect()
+            except PoolTimeoutError:
+                metrics.record_wait(time.perf_counter() - started, timed_out=True)
+                raise
+            metrics.record_wait(time.perf_counter() - started)
+            return connection
+
+    return MeteredQueuePool
+
+def engine_options(config, metrics=None):
+    """SQLALCHEMY_ENGINE_OPTIONS for the configured database"""
+    url = config['SQLALCHEMY_DATABASE_URI']
+    if url.startswith('sqlite'):
+        if ':memory:' in url or url in ('sqlite://', 'sqlite:///'):
+            return {}  # Flask-SQLAlchemy keeps in-memory databases on one static connection
+        return {'poolclass': metered_queue_pool(metrics)} if metrics else {}
+
+    if config['PGBOUNCER_MODE'] == 'transaction':
+        options = {'poolclass': NullPool}
+        if url.startswith('postgresql+psycopg:'):
+            options['connect_args'] = {'prepare_threshold': None}  # psycopg 3 auto-prepares otherwise
+        return options
+
+    pool_size, max_overflow = pool_sizing(
+        config['DB_MAX_CONNECTIONS'], config['GUNICORN_WORKERS'], config['GUNICORN_THREADS'],
+        config['DB_BACKGROUND_THREADS']
+    )
+    options = {
+        'pool_size': config['DB_POOL_SIZE'] if config['DB_POOL_SIZE'] is not None else pool_size,
+        'max_overflow': config['DB_MAX_OVERFLOW'] if config['DB_MAX_OVERFLOW'] is not None else max_overflow,
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+        # Reuse the most recent connection so idle extras age out instead of all staying warm
+        'pool_use_lifo': True,
+    }
+    if metrics is not None:
+        options['poolclass'] = metered_queue_pool(metrics)
+    return options
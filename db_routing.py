@@ -0,0 +1,64 @@
+"""Read/write routing between the primary database and a read replica.
+
+Views decorated with ``@read_only`` run their queries against the replica
+bind (SQLALCHEMY_BINDS['replica']) when one is configured; everything else,
+and anything flushed, goes to the primary. A browser that has just written
+(e.g. submitted an application) is pinned to the primary for a few seconds
+through its session cookie, so the status page it is redirected to never
+reads from a replica that hasn't caught up yet.
+"""
+import time
+from functools import wraps
+from flask import g, has_request_context, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+REPLICA_BIND = 'replica'
+STICKY_SESSION_KEY = 'read_primary_until'
+
+def read_only(view):
+    """Mark a view as safe to serve from the read replica"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        return view(*args, **kwargs)
+    wrapper.read_only = True
+    return wrapper
+
+def use_replica_for(view):
+    """Decide, at the start of a request, whether its reads may go to the replica"""
+    if not getattr(view, 'read_only', False):
+        return False
+    return time.time() >= session.get(STICKY_SESSION_KEY, 0)
+
+def pin_to_primary(seconds):
+    """Send this browser's reads to the primary for the next few seconds"""
+    session[STICKY_SESSION_KEY] = time.time() + seconds
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and not self.info.get('wrote')
+                and has_request_context() and g.get('read_replica')):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _track_write(session, flush_context):
+    # Reads later in the same transaction must see what was just written
+    session.info['wrote'] = True
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _track_bulk_write(orm_execute_state):
+    # Query.update()/delete() and insert() statements skip the flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info['wrote'] = True
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _track_commit(session):
+    if session.info.pop('wrote', False) and has_request_context():
+        g.committed_write = True
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _track_rollback(session):
+    session.info.pop('wrote', None)
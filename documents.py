@@ -0,0 +1,35 @@
+"""Content-addressed storage for applicant documents.
+
+Files are stored once under the key ``documents/<sha256>`` in the configured
+storage backend; identical uploads share one blob. The Document table in
+app.py records each blob with a reference count.
+"""
+
+def blob_key(sha256):
+    return f"documents/{sha256}"
+
+def put_blob(storage, sha256, source_path, keep_source=False):
+    """Move the finished local file at source_path into storage unless an identical blob exists.
+
+    Returns True if bytes were stored, False if the upload was a duplicate
+    (in which case source_path is left for the caller to discard). With
+    keep_source the file is copied instead, for callers that may still need
+    it if their transaction rolls back.
+    """
+    key = blob_key(sha256)
+    if storage.exists(key):
+        return False
+    if keep_source:
+        with open(source_path, 'rb') as f:
+            storage.save(key, f)
+    else:
+        storage.save_file(key, source_path)
+    return True
+
+def delete_blob(storage, sha256):
+    storage.delete(blob_key(sha256))
+
+def iter_blobs(storage):
+    """Yield the SHA-256 of every stored blob"""
+    for key in storage.keys('documents/'):
+        yield key.rsplit('/', 1)[-1]
@@ -0,0 +1,127 @@
+"""Publish/subscribe for application status changes.
+
+``LocalBroker`` fans messages out to subscribers in this process. It is all
+a single worker needs and is the stand-in used by tests. ``RedisBroker``
+publishes through a Redis-compatible server and relays every message it
+receives to its own ``LocalBroker``, so a decision made in one gunicorn
+worker reaches the applicants connected to any other (the ``redis``
+package is an optional dependency).
+"""
+import json
+import logging
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+class Subscription:
+    def __init__(self, broker, channel, max_pending=100):
+        self.broker = broker
+        self.channel = channel
+        self._messages = queue.Queue(maxsize=max_pending)
+
+    def get(self, timeout=None):
+        """Next message, or None if none arrived within timeout seconds"""
+        try:
+            return self._messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _deliver(self, message):
+        try:
+            self._messages.put_nowait(message)
+        except queue.Full:
+            pass  # a stalled subscriber only needs to know something changed
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class LocalBroker:
+    def __init__(self):
+        self._subscribers = {}  # channel -> set of Subscriptions
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel)
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription._deliver(message)
+        return len(subscribers)
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(s) for s in self._subscribers.values())
+
+class RedisBroker:
+    def __init__(self, client, prefix='events:'):
+        self.client = client
+        self.prefix = prefix
+        self.local = LocalBroker()
+        self._listener = None
+        self._lock = threading.Lock()
+
+    def _ensure_listener(self):
+        # Started on first subscribe so that forked gunicorn workers each run their own
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(self.prefix + '*')
+                self._listener = threading.Thread(target=self._listen, args=(pubsub,), daemon=True,
+                                                  name='events-listener')
+                self._listener.start()
+
+    def _listen(self, pubsub):
+        for item in pubsub.listen():
+            if item.get('type') != 'pmessage':
+                continue
+            channel = item['channel']
+            channel = channel.decode() if isinstance(channel, bytes) else channel
+            try:
+                self.local.publish(channel[len(self.prefix):], json.loads(item['data']))
+            except ValueError:
+                logger.error(f"Ignoring malformed event on {channel}")
+
+    def subscribe(self, channel):
+        self._ensure_listener()
+        return self.local.subscribe(channel)
+
+    def unsubscribe(self, subscription):
+        self.local.unsubscribe(subscription)
+
+    def publish(self, channel, message):
+        return self.client.publish(self.prefix + channel, json.dumps(message))
+
+    def subscriber_count(self):
+        return self.local.subscriber_count()
+
+def build_broker(url):
+    """In-process broker for an empty/memory:// url, Redis pub/sub for redis:// urls"""
+    if not url or url == 'memory://':
+        return LocalBroker()
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError(f"Event broker {url} requires redis (pip install redis)")
+        return RedisBroker(redis.Redis.from_url(url))
+    raise ValueError(f"Unknown event broker URL: {url}")
@@ -0,0 +1,33 @@
+"""Gunicorn settings, loaded automatically by `gunicorn app:app` from the project root.
+
+Status pages hold an event stream open for up to STATUS_EVENTS_MAX_SECONDS,
+which would tie up a whole sync worker, so workers are threaded (gthread).
+Each stream still holds one of the worker's threads, so app.py caps them at
+STATUS_EVENTS_MAX_STREAMS per worker. Don't raise the thread count to fit
+more streams; if many applicants need to watch at once, run an async worker
+(`gunicorn -k gevent app:app`, which needs `gevent`) and raise the cap instead.
+The worker count still comes from WEB_CONCURRENCY/GUNICORN_CMD_ARGS, which
+db_pool.py reads with the thread count to size each worker's connection pool.
+The hooks below set up Prometheus multiprocess mode (see metrics.py).
+"""
+import os
+import shutil
+import tempfile
+from db_pool import gunicorn_setting
+
+worker_class = 'gthread'
+threads = gunicorn_setting(os.environ, 'GUNICORN_THREADS', ('--threads',), 8)
+os.environ['GUNICORN_THREADS'] = str(threads)  # workers size their pools for the same count
+
+# Must be set before a worker imports prometheus_client
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'prometheus-multiproc'))
+
+def on_starting(server):
+    # Files left by a previous run would be added to this run's totals
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
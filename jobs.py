@@ -0,0 +1,76 @@
+"""In-process background job queue.
+
+A thin wrapper around ThreadPoolExecutor that retries failed jobs with a
+linear backoff and keeps track of outstanding work. Job state that has to
+survive the process (e.g. letter generation status) is persisted by the job
+functions themselves, so any gunicorn worker can report on it.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+logger = logging.getLogger(__name__)
+
+class JobQueue:
+    def __init__(self, name, max_workers=2, max_attempts=3, retry_delay=1.0, eager=False, depth_gauge=None):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.eager = eager
+        self.depth_gauge = depth_gauge  # anything with inc()/dec(), e.g. a Prometheus Gauge
+        self._executor = None
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        # Created lazily so that forked gunicorn workers each start their own threads
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+            return self._executor
+
+    def _run(self, func, args):
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                return func(*args)
+            except Exception as e:
+                logger.error(f"{self.name} job {func.__name__}{args} failed (attempt {attempt}/{self.max_attempts}): {e}")
+                if attempt == self.max_attempts:
+                    raise
+                time.sleep(self.retry_delay * attempt)
+
+    def submit(self, func, *args):
+        """Queue func(*args); runs inline when the queue is eager (tests, single-process scripts)"""
+        if self.eager:
+            try:
+                self._run(func, args)
+            except Exception:
+                pass
+            return None
+
+        if self.depth_gauge is not None:
+            self.depth_gauge.inc()
+        future = self._get_executor().submit(self._run, func, args)
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._discard)
+        return future
+
+    def _discard(self, future):
+        with self._lock:
+            self._pending.discard(future)
+        if self.depth_gauge is not None:
+            self.depth_gauge.dec()
+
+    def depth(self):
+        """Number of jobs queued or running in this process"""
+        with self._lock:
+            return len(self._pending)
+
+    def join(self, timeout=None):
+        """Block until every job submitted so far has finished"""
+        with self._lock:
+            pending = list(self._pending)
+        wait(pending, timeout=timeout)
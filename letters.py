@@ -0,0 +1,161 @@
+"""Admission letter rendering.
+
+Kept free of Flask and database imports so that letters can be rendered in
+worker processes (see ``render_letter_to_file``) from plain dicts of
+applicant fields.
+"""
+import io
+import threading
+from datetime import datetime
+from functools import lru_cache
+from xml.sax.saxutils import escape
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.lib import colors
+from storage import build_storage
+
+# Bump whenever the letter layout or wording changes so cached letters are re-rendered
+LETTER_TEMPLATE_VERSION = 1
+
+def letter_filename(application_id):
+    return f"admission_letter_{application_id}.pdf"
+
+def letter_fields(application):
+    """Extract the plain fields a letter needs from an Application"""
+    return {
+        'application_id': application.application_id,
+        'first_name': application.first_name,
+        'last_name': application.last_name,
+        'email': application.email,
+        'phone': application.phone,
+        'program': application.program,
+        'gpa': application.gpa,
+    }
+
+LETTER_BODY = """
+    Dear {name},
+
+    We are pleased to inform you that your application for admission to our {program} program has been approved.
+    Your application ID is {application_id}.
+
+    Based on your academic background and qualifications, we are confident that you will be a valuable addition to our institution.
+
+    Please note the following important information:
+    • Your application has been reviewed and approved by our admissions committee
+    • You will receive further instructions regarding enrollment procedures
+    • Please keep this admission letter for your records
+
+    We look forward to welcoming you to our institution and wish you success in your academic journey.
+
+    Best regards,
+    Admissions Committee
+    """
+
+class LetterTemplate:
+    """Styles and static flowables for the admission letter, built once per process.
+
+    Only the per-applicant paragraphs and table are created for each letter.
+    Flowables keep layout state while a document is built, so the shared
+    static ones are kept per thread.
+    """
+
+    def __init__(self):
+        styles = getSampleStyleSheet()
+        self.title_style = ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=24,
+            spaceAfter=30,
+            alignment=1  # Center alignment
+        )
+        self.date_style = ParagraphStyle(
+            'DateStyle',
+            parent=styles['Normal'],
+            fontSize=12,
+            spaceAfter=20
+        )
+        self.content_style = ParagraphStyle(
+            'ContentStyle',
+            parent=styles['Normal'],
+            fontSize=12,
+            spaceAfter=12,
+            alignment=0  # Left alignment
+        )
+        self.table_style = TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ])
+        # Paragraph collapses whitespace anyway; doing it once here saves the work per letter
+        self.body = ' '.join(LETTER_BODY.split())
+        self._local = threading.local()
+
+    def _static(self):
+        if not hasattr(self._local, 'title'):
+            self._local.title = Paragraph("ADMISSION LETTER", self.title_style)
+            self._local.spacer_20 = Spacer(1, 20)
+            self._local.spacer_30 = Spacer(1, 30)
+        return self._local
+
+    def render(self, fields):
+        """Render an admission letter PDF for fields and return its bytes"""
+        static = self._static()
+        name = f"{fields['first_name']} {fields['last_name']}"
+        program = fields['program'].replace('_', ' ').title()
+
+        student_info = [
+            ['Application ID:', fields['application_id']],
+            ['Student Name:', name],
+            ['Email:', fields['email']],
+            ['Phone:', fields['phone']],
+            ['Program:', program],
+            ['GPA:', str(fields['gpa'])]
+        ]
+        table = Table(student_info, colWidths=[2*inch, 4*inch])
+        table.setStyle(self.table_style)
+
+        # Applicant values are escaped since Paragraph text is parsed as markup
+        body = self.body.format(name=escape(name), program=escape(program),
+                                application_id=escape(fields['application_id']))
+        story = [
+            static.title,
+            static.spacer_20,
+            Paragraph(f"Date: {datetime.now().strftime('%B %d, %Y')}", self.date_style),
+            static.spacer_20,
+            table,
+            static.spacer_30,
+            Paragraph(body, self.content_style),
+        ]
+
+        buffer = io.BytesIO()
+        SimpleDocTemplate(buffer, pagesize=letter).build(story)
+        return buffer.getvalue()
+
+@lru_cache(maxsize=1)
+def get_letter_template():
+    return LetterTemplate()
+
+def render_admission_letter(fields):
+    """Render an admission letter PDF and return its bytes"""
+    return get_letter_template().render(fields)
+
+_storages = {}
+
+def get_storage(storage_config):
+    """One storage backend per worker process, built from a plain config dict"""
+    key = tuple(sorted(storage_config.items()))
+    if key not in _storages:
+        _storages[key] = build_storage(storage_config)
+    return _storages[key]
+
+def render_letter_to_file(task):
+    """Process pool entry point: task is (fields, storage_config); returns (application_id, storage key)"""
+    fields, storage_config = task
+    key = letter_filename(fields['application_id'])
+    get_storage(storage_config).save(key, io.BytesIO(render_admission_letter(fields)))
+    return fields['application_id'], key
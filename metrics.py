@@ -0,0 +1,91 @@
+"""Prometheus metrics.
+
+Every gunicorn worker keeps its own metric values. When
+PROMETHEUS_MULTIPROC_DIR is set (gunicorn.conf.py sets it before any worker
+starts) prometheus_client writes them to per-process files there, and
+``render`` merges the files of all workers, so whichever worker answers
+/metrics reports the whole server. Gauges use ``livesum`` so a worker's
+contribution disappears when it exits.
+
+Values that a scrape can't observe in other workers (job queue depth, pool
+checkouts) are updated as they change rather than read at scrape time.
+"""
+import os
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+from db_pool import PoolMetrics
+
+# Most pages render in tens of milliseconds; uploads and letters take seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+request_duration = Histogram(
+    'http_request_duration_seconds', 'Time to produce a response, by endpoint, method and status',
+    ['endpoint', 'method', 'status'], buckets=LATENCY_BUCKETS
+)
+requests_in_progress = Gauge(
+    'http_requests_in_progress', 'Requests being handled (including open event streams)',
+    ['endpoint'], multiprocess_mode='livesum'
+)
+upload_bytes = Counter(
+    'upload_bytes', 'Applicant document bytes received, from form posts or resumable upload chunks',
+    ['source']
+)
+letter_render_duration = Histogram(
+    'letter_render_duration_seconds', 'Time to render an admission letter PDF',
+    ['trigger'], buckets=LATENCY_BUCKETS
+)
+job_queue_depth = Gauge(
+    'job_queue_depth', 'Background jobs queued or running', ['queue'], multiprocess_mode='livesum'
+)
+db_pool_size = Gauge('db_pool_size', 'Configured steady connections per pool', multiprocess_mode='livesum')
+db_pool_checked_out = Gauge('db_pool_checked_out', 'Connections checked out of the pool', multiprocess_mode='livesum')
+db_pool_checkouts = Counter('db_pool_checkouts', 'Connection checkouts')
+db_pool_connects = Counter('db_pool_connects', 'New database connections opened')
+db_pool_invalidations = Counter('db_pool_invalidations', 'Connections invalidated after errors')
+db_pool_timeouts = Counter('db_pool_timeouts', 'Checkouts that timed out waiting for a connection')
+db_pool_wait = Histogram(
+    'db_pool_wait_seconds', 'Time spent waiting to check out a connection',
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+)
+
+class PrometheusPoolMetrics(PoolMetrics):
+    """PoolMetrics that also reports to Prometheus"""
+
+    def install(self, engine):
+        super().install(engine)
+        if hasattr(engine.pool, 'size'):
+            db_pool_size.inc(engine.pool.size())
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        super()._on_connect(dbapi_connection, connection_record)
+        db_pool_connects.inc()
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        super()._on_checkout(dbapi_connection, connection_record, connection_proxy)
+        db_pool_checkouts.inc()
+        db_pool_checked_out.inc()
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        if 'checked_out_at' in connection_record.info:
+            db_pool_checked_out.dec()
+        super()._on_checkin(dbapi_connection, connection_record)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        super()._on_invalidate(dbapi_connection, connection_record, exception)
+        db_pool_invalidations.inc()
+
+    def record_wait(self, seconds, timed_out=False):
+        super().record_wait(seconds, timed_out)
+        db_pool_wait.observe(seconds)
+        if timed_out:
+            db_pool_timeouts.inc()
+
+def render():
+    """The exposition body and its content type, merged across workers when running multiprocess"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,131 @@
+"""Versioned schema migrations for the admission system.
+
+Each migration is a numbered list of steps: SQL strings, or callables taking
+the connection for changes that need to inspect the schema first. Applied
+versions are recorded in the ``schema_version`` table so every migration runs
+exactly once per database. ``init_db`` calls ``run_migrations`` after ``create_all``, which
+means fresh databases and existing deployments converge on the same schema.
+
+Every gunicorn worker runs ``init_db`` as it boots, so workers race to apply
+the same migration. Each migration runs under a database-wide lock (a
+Postgres advisory lock, or SQLite's write lock taken with BEGIN IMMEDIATE)
+and re-reads the applied versions once it holds it; the losers wait and
+then find nothing left to do.
+"""
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import IntegrityError
+
+logger = logging.getLogger(__name__)
+
+def add_column(table, column, ddl):
+    """Step that adds a column unless create_all already made it (or will make the whole table)"""
+    def step(connection):
+        inspector = inspect(connection)
+        if not inspector.has_table(table):
+            return
+        if column not in {c['name'] for c in inspector.get_columns(table)}:
+            connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    return step
+
+# (version, description, statements) - append new migrations, never edit old ones
+MIGRATIONS = [
+    (1, 'Add Application indexes for dashboard, filters and lookups', [
+        "CREATE INDEX IF NOT EXISTS ix_application_submitted_at_id ON application (submitted_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_application_status_submitted_at ON application (status, submitted_at)",
+        "CREATE INDEX IF NOT EXISTS ix_application_program_status ON application (program, status)",
+        "CREATE INDEX IF NOT EXISTS ix_application_email ON application (email)",
+    ]),
+    (2, 'Link Application documents to the content-addressed document table', [
+        add_column('application', 'degree_certificate_id', 'INTEGER REFERENCES document (id)'),
+        add_column('application', 'id_proof_id', 'INTEGER REFERENCES document (id)'),
+    ]),
+    (3, 'Add Application row version and update time for conditional GETs', [
+        add_column('application', 'version', 'INTEGER NOT NULL DEFAULT 1'),
+        add_column('application', 'updated_at', 'TIMESTAMP'),
+    ]),
+    (4, 'Record when a Document last gained a reference, for gc-documents', [
+        add_column('document', 'updated_at', 'TIMESTAMP'),
+    ]),
+]
+
+def get_applied_versions(connection):
+    """Return the set of migration versions already applied"""
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_version ("
+        "version INTEGER PRIMARY KEY, "
+        "description VARCHAR(255) NOT NULL, "
+        "applied_at TIMESTAMP NOT NULL)"
+    ))
+    return {row[0] for row in connection.execute(text("SELECT version FROM schema_version"))}
+
+# Arbitrary key for pg_advisory_xact_lock, shared by every process migrating this database
+MIGRATION_LOCK_KEY = 4127003
+
+@contextmanager
+def migration_transaction(engine):
+    """A transaction that only one process at a time can hold"""
+    if engine.dialect.name == 'sqlite':
+        # pysqlite defers BEGIN until the first write; take the write lock up front instead
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            connection.exec_driver_sql('BEGIN IMMEDIATE')
+            try:
+                yield connection
+            except BaseException:
+                connection.exec_driver_sql('ROLLBACK')
+                raise
+            connection.exec_driver_sql('COMMIT')
+    else:
+        with engine.begin() as connection:
+            if engine.dialect.name == 'postgresql':
+                connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {'key': MIGRATION_LOCK_KEY})
+            yield connection
+
+def apply_migration(engine, version, description, statements):
+    """Apply one migration unless another process already has; returns True if this call applied it"""
+    with migration_transaction(engine) as connection:
+        if version in get_applied_versions(connection):
+            return False
+        logger.info(f"Applying migration {version}: {description}")
+        for statement in statements:
+            if callable(statement):
+                statement(connection)
+            else:
+                connection.execute(text(statement))
+        connection.execute(
+            text("INSERT INTO schema_version (version, description, applied_at) VALUES (:v, :d, :t)"),
+            {'v': version, 'd': description, 't': datetime.utcnow()}
+        )
+    return True
+
+def run_migrations(engine):
+    """Apply every pending migration in version order, each in its own transaction"""
+    with migration_transaction(engine) as connection:
+        applied = get_applied_versions(connection)
+
+    ran = []
+    for version, description, statements in sorted(MIGRATIONS, key=lambda m: m[0]):
+        if version in applied:
+            continue
+        try:
+            if apply_migration(engine, version, description, statements):
+                ran.append(version)
+        except IntegrityError:
+            # Databases without a lock above: another process recorded this version first
+            with engine.begin() as connection:
+                if version not in get_applied_versions(connection):
+                    raise
+
+    if ran:
+        logger.info(f"Applied migrations: {ran}")
+    else:
+        logger.info("Database schema is up to date")
+    return ran
+
+def current_version(engine):
+    """Return the highest applied migration version, or 0 for an unmigrated database"""
+    with engine.begin() as connection:
+        applied = get_applied_versions(connection)
+    return max(applied, default=0)
@@ -0,0 +1,79 @@
+"""First-page preview thumbnails for applicant documents.
+
+Previews are JPEGs stored next to the documents under the content-addressed
+key ``previews/<sha256>-<width>-v<version>.jpg``, so a document that is
+shared by several applications is only rendered once and a preview URL never
+changes meaning. Images are thumbnailed with Pillow. PDFs are rasterised with
+PyMuPDF when it is installed, otherwise with poppler's ``pdftoppm``. Both
+renderers are optional: without one, ``render_preview`` returns None and
+reviewers fall back to opening the document itself.
+"""
+import io
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever preview rendering changes so stale thumbnails get new keys
+PREVIEW_VERSION = 1
+PREVIEW_QUALITY = 80
+
+def preview_key(sha256, width):
+    return f"previews/{sha256}-{width}-v{PREVIEW_VERSION}.jpg"
+
+def render_pdf_page(path, width):
+    """Rasterise the first page of the PDF at path to a PIL image, or None without a renderer"""
+    from PIL import Image
+    try:
+        import fitz  # PyMuPDF
+    except ImportError:
+        fitz = None
+    if fitz is not None:
+        with fitz.open(path) as pdf:
+            page = pdf[0]
+            zoom = width / page.rect.width
+            pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+            return Image.frombytes('RGB', (pixmap.width, pixmap.height), pixmap.samples)
+
+    if shutil.which('pdftoppm') is None:
+        return None
+    with tempfile.TemporaryDirectory() as directory:
+        prefix = os.path.join(directory, 'page')
+        subprocess.run(
+            ['pdftoppm', '-f', '1', '-l', '1', '-singlefile', '-png', '-scale-to-x', str(width),
+             '-scale-to-y', '-1', path, prefix],
+            check=True, capture_output=True, timeout=60
+        )
+        with Image.open(prefix + '.png') as image:
+            image.load()
+            return image
+
+def render_preview(path, width):
+    """Return JPEG bytes of a preview of the document at path, or None if it can't be rendered"""
+    try:
+        from PIL import Image
+    except ImportError:
+        logger.warning("Document previews require Pillow (pip install Pillow)")
+        return None
+
+    with open(path, 'rb') as f:
+        is_pdf = f.read(4) == b'%PDF'
+    if is_pdf:
+        image = render_pdf_page(path, width)
+        if image is None:
+            logger.info("No PDF renderer available (install PyMuPDF or poppler-utils) - skipping preview")
+            return None
+    else:
+        image = Image.open(path)
+        # Let the JPEG decoder downscale while decoding instead of inflating the full image
+        image.draft('RGB', (width, width * 4))
+
+    image.thumbnail((width, width * 4))
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    output = io.BytesIO()
+    image.save(output, 'JPEG', quality=PREVIEW_QUALITY, optimize=True)
+    return output.getvalue()
@@ -0,0 +1,93 @@
+"""Per-request SQL instrumentation.
+
+``install`` hooks an engine's cursor events so every statement is timed.
+Inside a request the timings accumulate in the ``QueryStats`` on ``g``:
+query count, total database time and the slowest statement, which app.py
+reports in a Server-Timing header. Statements slower than the slow-query
+threshold are logged wherever they run (request or background job).
+
+A view can declare how many queries it may issue with ``@query_budget(n)``.
+Over budget is logged in production and raises ``QueryBudgetExceeded`` under
+TESTING, so a change that adds queries to a route (typically an N+1 from a
+lazy-loaded relationship in a loop) fails the test suite.
+"""
+import logging
+import time
+from collections import Counter
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement = None
+        self.statements = Counter()
+
+    def record(self, statement, seconds):
+        self.count += 1
+        self.seconds += seconds
+        self.statements[statement] += 1
+        if seconds >= self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+    def repeated(self, threshold):
+        """Statements issued at least threshold times, most repeated first"""
+        return [(statement, n) for statement, n in self.statements.most_common() if n >= threshold]
+
+def query_budget(max_queries):
+    """Declare the most queries a view may issue per request"""
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+def start_request():
+    g.query_stats = QueryStats()
+
+def current_stats():
+    return g.get('query_stats') if has_request_context() else None
+
+def install(engine, slow_query_ms):
+    """Time every statement engine executes; log those slower than slow_query_ms"""
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_timer(connection, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_started = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def stop_timer(connection, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_query_started', None)
+        if started is None:
+            return
+        seconds = time.perf_counter() - started
+        stats = current_stats()
+        if stats is not None:
+            stats.record(statement, seconds)
+        if seconds * 1000 >= slow_query_ms:
+            where = request.endpoint if has_request_context() else 'background'
+            logger.warning(f"Slow query ({seconds * 1000:.1f} ms in {where}): {' '.join(statement.split())}")
+
+def server_timing(stats, total_seconds):
+    """Server-Timing header value: database time and query count, and the whole request"""
+    return (f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries", '
+            f'app;dur={total_seconds * 1000:.1f}')
+
+def check_request(stats, view, repeat_threshold, strict=False):
+    """Log likely N+1 patterns and enforce the view's query budget"""
+    for statement, n in stats.repeated(repeat_threshold):
+        logger.warning(f"Possible N+1 in {request.endpoint}: statement ran {n} times: "
+                       f"{' '.join(statement.split())}")
+    budget = getattr(view, 'query_budget', None)
+    if budget is not None and stats.count > budget:
+        message = f"{request.endpoint} issued {stats.count} queries (budget {budget})"
+        if strict:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
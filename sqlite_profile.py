@@ -0,0 +1,48 @@
+"""Production connection settings for SQLite.
+
+SQLite's defaults suit a single process. Several gunicorn workers writing to
+one database file need more than that:
+
+    journal_mode=WAL      readers no longer block the writer (and vice versa)
+    synchronous=NORMAL    fsync at checkpoints rather than every commit; safe in WAL mode
+    busy_timeout          wait for a competing writer instead of failing with "database is locked"
+    cache_size / mmap_size  keep hot pages in memory across requests
+
+The pragmas are per connection (journal_mode is also persisted in the file),
+so they are applied from a ``connect`` event on every new pooled connection.
+"""
+from sqlalchemy import event
+
+def sqlite_pragmas(config):
+    """Build the ordered pragma settings from app config"""
+    return {
+        'journal_mode': config['SQLITE_JOURNAL_MODE'],
+        'synchronous': config['SQLITE_SYNCHRONOUS'],
+        'busy_timeout': config['SQLITE_BUSY_TIMEOUT_MS'],
+        'cache_size': -config['SQLITE_CACHE_SIZE_KB'],  # negative means KiB rather than pages
+        'mmap_size': config['SQLITE_MMAP_SIZE'],
+        'temp_store': 'MEMORY',
+    }
+
+def apply_sqlite_profile(engine, pragmas):
+    """Run pragmas on every connection engine opens; a no-op for other databases.
+
+    Returns True if the engine is SQLite and the profile was installed.
+    """
+    if engine.dialect.name != 'sqlite':
+        return False
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    return True
+
+def read_pragmas(connection, names):
+    """Return the current value of each named pragma on a SQLAlchemy connection"""
+    return {name: connection.exec_driver_sql(f"PRAGMA {name}").scalar() for name in names}
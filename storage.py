@@ -0,0 +1,269 @@
+"""Storage backends for uploaded documents and admission letters.
+
+Every backend stores opaque byte blobs under slash-separated keys such as
+``documents/<sha256>`` or ``admission_letter_APP123.pdf`` and exposes the same
+small interface:
+
+    save(key, stream)        stream a readable file object into key
+    save_file(key, path)     move a finished local file into key
+    open(key)                readable binary stream (FileNotFoundError if missing)
+    exists(key) / size(key) / modified_at(key) / delete(key)
+    keys(prefix)             iterate stored keys
+    local_path(key)          filesystem path, or None for remote backends
+    url(key, ...)            presigned download URL, or None for local backends
+
+``LocalStorage`` maps keys straight onto a directory, ``ShardedStorage``
+spreads them over hashed two-level subdirectories, and ``S3Storage`` talks
+to any S3-compatible service (AWS, MinIO, moto) through boto3, which is an
+optional dependency.
+"""
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+
+CHUNK_SIZE = 64 * 1024
+
+# Names the app has written into the flat upload folder: content-addressed
+# documents and their previews, admission letters, and the per-application
+# uploads (APP..._degree_<name>, APP..._id_<name>) from before the document store
+FLAT_LAYOUT_KEY = re.compile(
+    r'^(documents/[0-9a-f]{64}|previews/[0-9a-f]{64}-\d+-v\d+\.jpg'
+    r'|admission_letter_\w+\.pdf|APP\w*?_(degree|id)_[^/]+)$'
+)
+SHARD_DIR = re.compile(r'^[0-9a-f]{2}$')
+
+class LocalStorage:
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.root, *key.split('/'))
+
+    def key_for_path(self, relative_parts):
+        return '/'.join(relative_parts)
+
+    def save(self, key, stream):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                shutil.copyfileobj(stream, f, CHUNK_SIZE)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    def save_file(self, key, source_path):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.move(source_path, path)  # a rename when on the same filesystem
+
+    def read_path(self, key):
+        """Path to read key from; the same as path() except in ShardedStorage"""
+        return self.path(key)
+
+    def open(self, key):
+        return open(self.read_path(key), 'rb')
+
+    def exists(self, key):
+        return os.path.exists(self.read_path(key))
+
+    def size(self, key):
+        return os.path.getsize(self.read_path(key))
+
+    def modified_at(self, key):
+        return os.path.getmtime(self.read_path(key))
+
+    def delete(self, key):
+        try:
+            os.unlink(self.read_path(key))
+        except FileNotFoundError:
+            pass
+
+    def keys(self, prefix=''):
+        for directory, _, filenames in os.walk(self.root):
+            relative = os.path.relpath(directory, self.root)
+            parts = [] if relative == '.' else relative.split(os.sep)
+            for filename in filenames:
+                if filename.startswith('.'):
+                    continue
+                key = self.key_for_path(parts + [filename])
+                if key is not None and key.startswith(prefix):
+                    yield key
+
+    def local_path(self, key):
+        return self.read_path(key)
+
+    def url(self, key, expires=3600, filename=None):
+        return None
+
+class ShardedStorage(LocalStorage):
+    """Local storage that keeps at most a few hundred entries per directory.
+
+    A key is stored under <root>/<h[0:2]>/<h[2:4]>/<key>, where h is the
+    SHA-256 of the key, so lookups stay O(1) however many files there are.
+    Files still in the old flat layout (<root>/<key>) remain readable until
+    ``flask migrate-storage`` moves them with ``legacy_files``/``adopt``.
+    """
+
+    def path(self, key):
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.root, digest[:2], digest[2:4], *key.split('/'))
+
+    def flat_path(self, key):
+        return os.path.join(self.root, *key.split('/'))
+
+    def read_path(self, key):
+        path = self.path(key)
+        if not os.path.exists(path):
+            flat = self.flat_path(key)
+            if os.path.exists(flat):
+                return flat
+        return path
+
+    def key_for_path(self, relative_parts):
+        key = self._sharded_key(relative_parts)
+        return key if key is not None else '/'.join(relative_parts)
+
+    def _sharded_key(self, relative_parts):
+        """The key of a file inside the shard layout, or None for a flat-layout file"""
+        if len(relative_parts) < 3:
+            return None
+        key = '/'.join(relative_parts[2:])
+        if self.path(key) != os.path.join(self.root, *relative_parts):
+            return None
+        return key
+
+    def _subdirectories(self, directory, pattern):
+        try:
+            names = sorted(os.listdir(directory))
+        except FileNotFoundError:
+            return []
+        return [name for name in names if pattern.match(name) and os.path.isdir(os.path.join(directory, name))]
+
+    def keys(self, prefix=''):
+        # Only the shard directories are walked: STORAGE_ROOT may be a shared
+        # directory (the upload folder is the system temp dir on Render)
+        for first in self._subdirectories(self.root, SHARD_DIR):
+            for second in self._subdirectories(os.path.join(self.root, first), SHARD_DIR):
+                shard = os.path.join(self.root, first, second)
+                for directory, _, filenames in os.walk(shard):
+                    parts = os.path.relpath(directory, self.root).split(os.sep)
+                    for filename in filenames:
+                        key = None if filename.startswith('.') else self._sharded_key(parts + [filename])
+                        if key is not None and key.startswith(prefix):
+                            yield key
+        for key, _ in self.legacy_files():
+            if key.startswith(prefix):
+                yield key
+
+    def legacy_files(self):
+        """Yield (key, path) for every file the app wrote that is still in the flat layout"""
+        for directory in ('', 'documents', 'previews'):
+            try:
+                filenames = sorted(os.listdir(os.path.join(self.root, directory)))
+            except FileNotFoundError:
+                continue
+            for filename in filenames:
+                key = f"{directory}/{filename}" if directory else filename
+                path = os.path.join(self.root, directory, filename)
+                if FLAT_LAYOUT_KEY.match(key) and os.path.isfile(path):
+                    yield key, path
+
+    def adopt(self, key, path):
+        """Move a flat-layout file to its sharded location"""
+        target = self.path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(path, target)
+
+class S3Storage:
+    def __init__(self, bucket, prefix='', client=None, **client_kwargs):
+        if client is None:
+            try:
+                import boto3
+            except ImportError:
+                raise RuntimeError("STORAGE_BACKEND=s3 requires boto3 (pip install boto3)")
+            client = boto3.client('s3', **{k: v for k, v in client_kwargs.items() if v})
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip('/') + '/' if prefix.strip('/') else ''
+
+    def _key(self, key):
+        return self.prefix + key
+
+    def _head(self, key):
+        from botocore.exceptions import ClientError
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                raise FileNotFoundError(key)
+            raise
+
+    def save(self, key, stream):
+        # upload_fileobj switches to multipart uploads for large streams
+        self.client.upload_fileobj(stream, self.bucket, self._key(key))
+
+    def save_file(self, key, source_path):
+        self.client.upload_file(source_path, self.bucket, self._key(key))
+        os.unlink(source_path)
+
+    def open(self, key):
+        from botocore.exceptions import ClientError
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._key(key))['Body']
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                raise FileNotFoundError(key)
+            raise
+
+    def exists(self, key):
+        try:
+            self._head(key)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def size(self, key):
+        return self._head(key)['ContentLength']
+
+    def modified_at(self, key):
+        return self._head(key)['LastModified'].timestamp()
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def keys(self, prefix=''):
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix)):
+            for item in page.get('Contents', []):
+                yield item['Key'][len(self.prefix):]
+
+    def local_path(self, key):
+        return None
+
+    def url(self, key, expires=3600, filename=None):
+        params = {'Bucket': self.bucket, 'Key': self._key(key)}
+        if filename:
+            params['ResponseContentDisposition'] = f'attachment; filename="{filename}"'
+        return self.client.generate_presigned_url('get_object', Params=params, ExpiresIn=expires)
+
+def build_storage(config):
+    """Create the backend selected by STORAGE_BACKEND (local, sharded or s3)"""
+    backend = config.get('STORAGE_BACKEND', 'sharded')
+    if backend == 'local':
+        return LocalStorage(config['STORAGE_ROOT'])
+    if backend == 'sharded':
+        return ShardedStorage(config['STORAGE_ROOT'])
+    if backend == 's3':
+        return S3Storage(
+            config['S3_BUCKET'],
+            prefix=config.get('S3_PREFIX', ''),
+            endpoint_url=config.get('S3_ENDPOINT_URL'),
+            region_name=config.get('S3_REGION'),
+        )
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
@@ -1,15 +1,54 @@
 import pytest
 import tempfile
 import os
+import atexit
+import shutil
+import base64
+import csv
+import gzip
+import hashlib
+import json
+import time
+import zlib
 from io import BytesIO
-from app import app, db, Application, Admin
+
+# Keep the test database out of the instance folder; app.py builds its engine at import
+TEST_DATABASE_DIR = tempfile.mkdtemp(prefix='admissions-test-')
+atexit.register(shutil.rmtree, TEST_DATABASE_DIR, ignore_errors=True)
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(TEST_DATABASE_DIR, 'admissions.db')
+
+from app import app, db, Application, Admin, LetterJob, keyset_page, get_status_counts, letter_queue, letter_cache, preview_queue, status_cache, status_broker
+from app import UploadSession, Document, document_key, storage
+from previews import preview_key
+from letters import LETTER_TEMPLATE_VERSION, render_admission_letter, get_letter_template
+from jobs import JobQueue
+from events import LocalBroker, RedisBroker
+from cache import MemoryCache, DiskCache, TieredCache, RedisCache, SingleFlight, build_cache
+from storage import LocalStorage, ShardedStorage, S3Storage, build_storage
+from migrations import MIGRATIONS, run_migrations, current_version
+from db_pool import PoolMetrics, engine_options, gunicorn_workers, normalize_database_url, pool_sizing
+from db_routing import REPLICA_BIND
+import metrics
+import query_stats
+from query_stats import QueryBudgetExceeded, QueryStats
+from sqlite_profile import apply_sqlite_profile, sqlite_pragmas, read_pragmas
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.pool import QueuePool
 from datetime import datetime
 
 @pytest.fixture
-def client():
+def client(tmp_path, monkeypatch):
     app.config['TESTING'] = True
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
     app.config['WTF_CSRF_ENABLED'] = False
+    # Uploads, documents, letters and previews go to a fresh directory for every test
+    for key in ('UPLOAD_FOLDER', 'STORAGE_ROOT'):
+        os.makedirs(tmp_path / key.lower())
+        monkeypatch.setitem(app.config, key, str(tmp_path / key.lower()))
+    monkeypatch.setattr(storage, 'root', app.config['STORAGE_ROOT'])
+    letter_queue.eager = True
+    preview_queue.eager = True
+    letter_cache.clear()
+    status_cache.clear()
     
     with app.test_client() as client:
         with app.app_context():
@@ -19,7 +58,8 @@ def client():
             db.session.add(admin)
             db.session.commit()
             yield client
-        db.drop_all()
+            db.session.remove()
+            db.drop_all()
 
 @pytest.fixture
 def sample_application_data():
@@ -35,6 +75,28 @@ def sample_application_data():
         'gpa': '3.8'
     }
 
+def create_application(application_id, **overrides):
+    """Insert a minimal application row for tests"""
+    fields = dict(
+        application_id=application_id,
+        first_name='Test',
+        last_name='User',
+        email=f'{application_id.lower()}@test.com',
+        phone='1234567890',
+        date_of_birth=datetime.now().date(),
+        address='Test Address',
+        program='computer_science',
+        previous_education='Test Education',
+        gpa=3.5,
+        degree_certificate='test_degree.pdf',
+        id_proof='test_id.pdf'
+    )
+    fields.update(overrides)
+    application = Application(**fields)
+    db.session.add(application)
+    db.session.commit()
+    return application
+
 class TestApplicationSubmission:
     """Test application submission functionality"""
     
@@ -53,8 +115,8 @@ class TestApplicationSubmission:
     def test_application_submission_success(self, client, sample_application_data):
         """Test successful application submission"""
         # Create test files
-        degree_file = (BytesIO(b'fake degree certificate'), 'degree.pdf')
-        id_file = (BytesIO(b'fake id proof'), 'id.pdf')
+        degree_file = (BytesIO(b'%PDF-1.4 fake degree certificate'), 'degree.pdf')
+        id_file = (BytesIO(b'%PDF-1.4 fake id proof'), 'id.pdf')
         
         data = sample_application_data.copy()
         data['degree_certificate'] = degree_file
@@ -74,6 +136,62 @@ class TestApplicationSubmission:
             assert application.email == 'john.doe@example.com'
             assert application.status == 'pending'
     
+    def test_apply_page_submits_after_uploading(self, client):
+        """Test that the upload script doesn't call form.submit, which the submit button shadows"""
+        page = client.get('/apply').get_data(as_text=True)
+        assert 'name="submit"' in page
+        assert 'form.submit()' not in page
+        assert 'HTMLFormElement.prototype.submit.call(form)' in page
+
+    def test_wrong_file_type_is_rejected_early(self, client, sample_application_data):
+        """Test that disallowed extensions and mismatched signatures are refused"""
+        data = sample_application_data.copy()
+        data['degree_certificate'] = (BytesIO(b'MZ not really a pdf'), 'degree.exe')
+        data['id_proof'] = (BytesIO(b'%PDF-1.4 id'), 'id.pdf')
+        response = client.post('/apply', data=data, content_type='multipart/form-data')
+        assert response.status_code == 302
+
+        data['degree_certificate'] = (BytesIO(b'MZ not really a pdf'), 'degree.pdf')
+        data['id_proof'] = (BytesIO(b'%PDF-1.4 id'), 'id.pdf')
+        response = client.post('/apply', data=data, content_type='multipart/form-data', follow_redirects=True)
+        assert b'does not look like a .pdf file' in response.data
+
+        # A bad second part aborts the parse after the first part was spooled
+        data['degree_certificate'] = (BytesIO(b'%PDF-1.4 degree'), 'degree.pdf')
+        data['id_proof'] = (BytesIO(b'MZ not really a pdf'), 'id.pdf')
+        response = client.post('/apply', data=data, content_type='multipart/form-data', follow_redirects=True)
+        assert b'does not look like a .pdf file' in response.data
+
+        with app.app_context():
+            assert Application.query.count() == 0
+        assert not [f for f in os.listdir(app.config['UPLOAD_FOLDER']) if f.startswith('.upload-')]
+
+    def test_oversized_file_is_rejected(self, client, sample_application_data, monkeypatch):
+        """Test that a file over the per-document limit aborts the upload"""
+        monkeypatch.setitem(app.config, 'UPLOAD_MAX_FILE_BYTES', 1024)
+        data = sample_application_data.copy()
+        data['degree_certificate'] = (BytesIO(b'%PDF' + b'0' * 4096), 'degree.pdf')
+        data['id_proof'] = (BytesIO(b'%PDF-1.4 id'), 'id.pdf')
+        response = client.post('/apply', data=data, content_type='multipart/form-data', follow_redirects=True)
+        assert b'is larger than' in response.data
+        with app.app_context():
+            assert Application.query.count() == 0
+
+    def test_upload_errors_outside_the_form_are_json(self, client):
+        """Test that 413/415 keep their status as JSON for API and upload clients, and redirect only the form"""
+        from app import request_entity_too_large, unsupported_media_type
+        from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+        for path, kwargs in (('/uploads/abc', {'method': 'PATCH'}), ('/api/applications', {}),
+                             ('/apply', {'method': 'POST', 'json': {}})):
+            with app.test_request_context(path, **kwargs):
+                response, status = request_entity_too_large(RequestEntityTooLarge('too big'))
+                assert (status, response.get_json()) == (413, {'error': 'too big'})
+                response, status = unsupported_media_type(UnsupportedMediaType('bad type'))
+                assert (status, response.get_json()) == (415, {'error': 'bad type'})
+        with app.test_request_context('/apply', method='POST', data={'full_name': 'x'}):
+            response = request_entity_too_large(RequestEntityTooLarge('too big'))
+            assert response.status_code == 302
+
     def test_application_validation_errors(self, client):
         """Test form validation errors"""
         # Submit form without required fields
@@ -99,6 +217,398 @@ class TestApplicationSubmission:
         assert response.status_code == 200
         assert b'GPA must be a number between 0.0 and 4.0' in response.data
 
+class TestDocumentStore:
+    """Test content-addressed document storage"""
+
+    def submit(self, client, data, degree=b'%PDF-1.4 same degree', id_proof=b'%PDF-1.4 same id'):
+        data = dict(data, degree_certificate=(BytesIO(degree), 'degree.pdf'), id_proof=(BytesIO(id_proof), 'id.pdf'))
+        return client.post('/apply', data=data, content_type='multipart/form-data')
+
+    def test_identical_uploads_are_stored_once(self, client, sample_application_data):
+        """Test that resubmitting the same documents shares the stored blobs"""
+        assert self.submit(client, sample_application_data).status_code == 302
+        assert self.submit(client, sample_application_data).status_code == 302
+        assert self.submit(client, sample_application_data, id_proof=b'%PDF-1.4 other id').status_code == 302
+
+        with app.app_context():
+            first, second, third = Application.query.order_by(Application.id).all()
+            assert first.degree_certificate_id == second.degree_certificate_id == third.degree_certificate_id
+            assert first.id_proof_id == second.id_proof_id != third.id_proof_id
+            counts = {d.sha256: d.ref_count for d in Document.query}
+            assert counts[hashlib.sha256(b'%PDF-1.4 same degree').hexdigest()] == 3
+            assert counts[hashlib.sha256(b'%PDF-1.4 same id').hexdigest()] == 2
+            assert counts[hashlib.sha256(b'%PDF-1.4 other id').hexdigest()] == 1
+            with storage.open(document_key(first.degree_certificate_document)) as f:
+                assert f.read() == b'%PDF-1.4 same degree'
+
+    def test_gc_removes_unreferenced_documents(self, client, sample_application_data):
+        """Test that gc-documents repairs counts and deletes orphaned blobs"""
+        assert self.submit(client, sample_application_data).status_code == 302
+        with app.app_context():
+            application = Application.query.one()
+            orphan = application.id_proof_document
+            orphan_key = document_key(orphan)
+            application.id_proof_id = None
+            db.session.commit()
+
+        # Recently referenced documents may belong to a submission that hasn't committed yet
+        result = app.test_cli_runner().invoke(args=['gc-documents'])
+        assert result.exit_code == 0, result.output
+        assert storage.exists(orphan_key)
+        with app.app_context():
+            assert Document.query.count() == 2
+            db.session.query(Document).update({'updated_at': datetime(2000, 1, 1)})
+            db.session.commit()
+
+        result = app.test_cli_runner().invoke(args=['gc-documents', '--batch-size', '1'])
+        assert result.exit_code == 0, result.output
+        assert not storage.exists(orphan_key)
+        with app.app_context():
+            assert Document.query.count() == 1
+            assert Document.query.one().ref_count == 1
+
+class TestDocumentServing:
+    """Test serving applicant documents to reviewers"""
+
+    degree = b'%PDF-1.4 ' + b'x' * 1000
+
+    def setup_document(self, client, sample_application_data):
+        data = dict(sample_application_data, degree_certificate=(BytesIO(self.degree), 'degree.pdf'),
+                    id_proof=(BytesIO(b'%PDF-1.4 id'), 'id.pdf'))
+        client.post('/apply', data=data, content_type='multipart/form-data')
+        application = Application.query.one()
+        return application, f'/admin/application/{application.id}/documents/degree_certificate'
+
+    def test_serve_document_with_strong_etag(self, client, sample_application_data):
+        """Test that documents are served inline with a strong ETag and honour If-None-Match"""
+        application, url = self.setup_document(client, sample_application_data)
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.data == self.degree
+        assert response.mimetype == 'application/pdf'
+        assert response.headers['ETag'] == f'"{hashlib.sha256(self.degree).hexdigest()}"'
+        assert 'private' in response.headers['Cache-Control']
+        assert response.headers['Accept-Ranges'] == 'bytes'
+
+        response = client.get(url, headers={'If-None-Match': response.headers['ETag']})
+        assert response.status_code == 304
+        assert response.data == b''
+
+        page = client.get(f'/admin/application/{application.id}')
+        assert url.encode() in page.data
+
+    def test_serve_document_range(self, client, sample_application_data):
+        """Test that Range requests return only the requested bytes"""
+        _, url = self.setup_document(client, sample_application_data)
+        response = client.get(url, headers={'Range': 'bytes=0-7'})
+        assert response.status_code == 206
+        assert response.data == b'%PDF-1.4'
+        assert response.headers['Content-Range'] == f'bytes 0-7/{len(self.degree)}'
+
+        etag = f'"{hashlib.sha256(self.degree).hexdigest()}"'
+        response = client.get(url, headers={'Range': 'bytes=-10', 'If-Range': etag})
+        assert response.status_code == 206
+        assert response.data == b'x' * 10
+        response = client.get(url, headers={'Range': 'bytes=0-7', 'If-Range': '"stale"'})
+        assert response.status_code == 200
+
+    def test_serve_document_offload(self, client, sample_application_data, monkeypatch):
+        """Test that offload modes send headers only and leave the bytes to the front-end server"""
+        application, url = self.setup_document(client, sample_application_data)
+        monkeypatch.setitem(app.config, 'DOCUMENT_OFFLOAD', 'x-accel-redirect')
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.data == b''
+        accel = response.headers['X-Accel-Redirect']
+        assert accel.startswith('/protected-uploads/')
+        assert accel.endswith('/' + document_key(application.degree_certificate_document))
+        assert client.get(url, headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+        monkeypatch.setitem(app.config, 'DOCUMENT_OFFLOAD', 'x-sendfile')
+        response = client.get(url)
+        assert os.path.isabs(response.headers['X-Sendfile'])
+        assert open(response.headers['X-Sendfile'], 'rb').read() == self.degree
+
+    def test_serve_unknown_document(self, client, sample_application_data):
+        """Test that unknown document kinds are not served"""
+        application, _ = self.setup_document(client, sample_application_data)
+        response = client.get(f'/admin/application/{application.id}/documents/password')
+        assert response.status_code == 302
+
+class TestDocumentPreviews:
+    """Test preview thumbnails of applicant documents"""
+
+    def png(self, size=(1200, 1600), color='navy'):
+        Image = pytest.importorskip('PIL.Image')
+        output = BytesIO()
+        Image.new('RGB', size, color).save(output, 'PNG')
+        return output.getvalue()
+
+    def test_preview_rendered_after_submission(self, client, sample_application_data):
+        """Test that submitting an image document produces a cached, immutable thumbnail"""
+        Image = pytest.importorskip('PIL.Image')
+        degree = self.png()
+        data = dict(sample_application_data, degree_certificate=(BytesIO(degree), 'degree.png'),
+                    id_proof=(BytesIO(b'%PDF-1.4 id'), 'id.pdf'))
+        assert client.post('/apply', data=data, content_type='multipart/form-data').status_code == 302
+
+        sha256 = hashlib.sha256(degree).hexdigest()
+        key = preview_key(sha256, app.config['PREVIEW_WIDTH'])
+        assert storage.exists(key)  # rendered by the background queue
+
+        response = client.get(f'/admin/documents/{sha256}/preview.jpg')
+        assert response.status_code == 200
+        assert response.mimetype == 'image/jpeg'
+        assert 'immutable' in response.headers['Cache-Control']
+        assert 'max-age=31536000' in response.headers['Cache-Control']
+        with Image.open(BytesIO(response.data)) as thumbnail:
+            assert thumbnail.size == (app.config['PREVIEW_WIDTH'], app.config['PREVIEW_WIDTH'] * 4 // 3)
+
+        response = client.get(f'/admin/documents/{sha256}/preview.jpg', headers={'If-None-Match': response.headers['ETag']})
+        assert response.status_code == 304
+
+        page = client.get(f'/admin/application/{Application.query.one().id}')
+        assert f'/admin/documents/{sha256}/preview.jpg'.encode() in page.data
+
+    def test_preview_rendered_on_demand(self, client, sample_application_data, monkeypatch):
+        """Test that a preview the worker hasn't produced is rendered on request"""
+        monkeypatch.setattr('app.enqueue_previews', lambda *documents: None)
+        degree = self.png(color='white')
+        data = dict(sample_application_data, degree_certificate=(BytesIO(degree), 'degree.png'),
+                    id_proof=(BytesIO(b'%PDF-1.4 id'), 'id.pdf'))
+        client.post('/apply', data=data, content_type='multipart/form-data')
+        sha256 = hashlib.sha256(degree).hexdigest()
+        assert not storage.exists(preview_key(sha256, app.config['PREVIEW_WIDTH']))
+
+        assert client.get(f'/admin/documents/{sha256}/preview.jpg').status_code == 200
+        assert storage.exists(preview_key(sha256, app.config['PREVIEW_WIDTH']))
+
+    def test_unrenderable_preview(self, client, sample_application_data, monkeypatch):
+        """Test that documents without a renderer answer 404 without being cached"""
+        monkeypatch.setattr('previews.render_pdf_page', lambda path, width: None)
+        data = dict(sample_application_data, degree_certificate=(BytesIO(b'%PDF-1.4 degree'), 'degree.pdf'),
+                    id_proof=(BytesIO(b'%PDF-1.4 id'), 'id.pdf'))
+        client.post('/apply', data=data, content_type='multipart/form-data')
+        response = client.get(f"/admin/documents/{hashlib.sha256(b'%PDF-1.4 degree').hexdigest()}/preview.jpg")
+        assert response.status_code == 404
+        assert response.headers['Cache-Control'] == 'no-store'
+
+class TestStorageBackends:
+    """Test the pluggable storage backends"""
+
+    def exercise(self, backend):
+        backend.save('documents/abc', BytesIO(b'hello'))
+        backend.save('admission_letter_X.pdf', BytesIO(b'%PDF letter'))
+        with backend.open('documents/abc') as f:
+            assert f.read() == b'hello'
+        assert backend.exists('documents/abc')
+        assert backend.size('admission_letter_X.pdf') == 11
+        assert sorted(backend.keys()) == ['admission_letter_X.pdf', 'documents/abc']
+        assert list(backend.keys('documents/')) == ['documents/abc']
+        backend.delete('documents/abc')
+        assert not backend.exists('documents/abc')
+        with pytest.raises(FileNotFoundError):
+            backend.open('documents/abc')
+
+    def test_local_storage(self, tmp_path):
+        """Test that the flat local backend round-trips blobs"""
+        backend = LocalStorage(str(tmp_path))
+        self.exercise(backend)
+        assert backend.local_path('admission_letter_X.pdf') == str(tmp_path / 'admission_letter_X.pdf')
+        assert backend.url('admission_letter_X.pdf') is None
+
+    def test_sharded_storage(self, tmp_path):
+        """Test that the sharded backend nests files two hashed levels deep"""
+        backend = ShardedStorage(str(tmp_path))
+        self.exercise(backend)
+        relative = os.path.relpath(backend.local_path('admission_letter_X.pdf'), tmp_path).split(os.sep)
+        assert len(relative) == 3 and len(relative[0]) == 2 and len(relative[1]) == 2
+
+    def test_sharded_storage_reads_flat_layout(self, tmp_path):
+        """Test that files from the old flat layout stay readable until adopted"""
+        sha256 = hashlib.sha256(b'hello').hexdigest()
+        (tmp_path / 'admission_letter_X.pdf').write_bytes(b'%PDF old')
+        (tmp_path / 'documents').mkdir()
+        (tmp_path / 'documents' / sha256).write_bytes(b'hello')
+        # Files other programs keep in a shared root (e.g. /tmp) are never touched
+        (tmp_path / 'prometheus-multiproc').mkdir()
+        (tmp_path / 'prometheus-multiproc' / 'counter_123.db').write_bytes(b'')
+        (tmp_path / 'sess_abc').write_bytes(b'')
+        backend = ShardedStorage(str(tmp_path))
+        backend.save('documents/new', BytesIO(b'new'))
+        assert backend.exists('admission_letter_X.pdf')
+        assert sorted(key for key, _ in backend.legacy_files()) == ['admission_letter_X.pdf', f'documents/{sha256}']
+
+        for key, path in list(backend.legacy_files()):
+            backend.adopt(key, path)
+        assert list(backend.legacy_files()) == []
+        assert not (tmp_path / 'admission_letter_X.pdf').exists()
+        with backend.open(f'documents/{sha256}') as f:
+            assert f.read() == b'hello'
+        assert sorted(backend.keys()) == ['admission_letter_X.pdf', f'documents/{sha256}', 'documents/new']
+        assert (tmp_path / 'prometheus-multiproc' / 'counter_123.db').exists()
+        assert (tmp_path / 'sess_abc').exists()
+
+    def test_local_save_file_moves_source(self, tmp_path):
+        """Test that save_file moves a finished spool file into place"""
+        source = tmp_path / 'spool'
+        source.write_bytes(b'data')
+        backend = LocalStorage(str(tmp_path / 'store'))
+        backend.save_file('documents/def', str(source))
+        assert not source.exists()
+        assert backend.exists('documents/def')
+
+    def test_s3_storage(self):
+        """Test the S3 backend against moto's in-process S3 stand-in"""
+        boto3 = pytest.importorskip('boto3')
+        moto = pytest.importorskip('moto')
+        mock = moto.mock_aws() if hasattr(moto, 'mock_aws') else moto.mock_s3()
+        with mock:
+            client = boto3.client('s3', region_name='us-east-1')
+            client.create_bucket(Bucket='admissions')
+            backend = S3Storage('admissions', prefix='test', client=client)
+            self.exercise(backend)
+            url = backend.url('admission_letter_X.pdf', expires=60, filename='letter.pdf')
+            assert 'admissions' in url
+            assert 'Signature' in url
+
+    def test_build_storage_rejects_unknown_backend(self):
+        """Test that a typo in STORAGE_BACKEND fails loudly"""
+        with pytest.raises(ValueError):
+            build_storage({'STORAGE_BACKEND': 'ftp'})
+
+class TestStorageMigration:
+    """Test moving a flat upload folder into the sharded document store"""
+
+    def test_migrate_storage(self, client, tmp_path, monkeypatch):
+        """Test that legacy documents and letters are moved and their rows rewritten"""
+        backend = ShardedStorage(str(tmp_path))
+        monkeypatch.setattr('app.storage', backend)
+        monkeypatch.setitem(app.config, 'UPLOAD_FOLDER', str(tmp_path))
+        for i in range(3):
+            (tmp_path / f'APP00{i}_degree.pdf').write_bytes(b'%PDF same degree')
+            (tmp_path / f'APP00{i}_id.pdf').write_bytes(f'%PDF id {i}'.encode())
+            (tmp_path / f'admission_letter_APP00{i}.pdf').write_bytes(b'%PDF letter')
+            create_application(f'APP00{i}', degree_certificate=f'APP00{i}_degree.pdf', id_proof=f'APP00{i}_id.pdf',
+                               admission_letter_path=os.path.join(str(tmp_path), f'admission_letter_APP00{i}.pdf'))
+
+        result = app.test_cli_runner().invoke(args=['migrate-storage', '--batch-size', '2'])
+        assert result.exit_code == 0, result.output
+        assert 'Moved 6 legacy documents' in result.output
+        assert 'Rewrote 3 admission letter paths' in result.output
+
+        assert list(backend.legacy_files()) == []
+        assert Document.query.count() == 4  # the three degree certificates are identical
+        for application in Application.query:
+            assert application.admission_letter_path == f'admission_letter_{application.application_id}.pdf'
+            with backend.open(application.admission_letter_path) as f:
+                assert f.read() == b'%PDF letter'
+            with backend.open(document_key(application.id_proof_document)) as f:
+                assert f.read() == f'%PDF id {application.application_id[-1]}'.encode()
+        assert Document.query.filter_by(sha256=hashlib.sha256(b'%PDF same degree').hexdigest()).one().ref_count == 3
+
+        result = app.test_cli_runner().invoke(args=['migrate-storage'])
+        assert 'Moved 0 legacy documents' in result.output
+        assert 'Sharded 0 files' in result.output
+
+class TestResumableUploads:
+    """Test the tus-style resumable upload protocol"""
+
+    def start_upload(self, client, filename, length):
+        metadata = 'filename ' + base64.b64encode(filename.encode()).decode()
+        return client.post('/uploads', headers={'Upload-Length': str(length), 'Upload-Metadata': metadata})
+
+    def patch(self, client, location, offset, data):
+        return client.patch(location, data=data, headers={
+            'Upload-Offset': str(offset), 'Content-Type': 'application/offset+octet-stream'
+        })
+
+    def upload(self, client, filename, data):
+        location = self.start_upload(client, filename, len(data)).headers['Location']
+        assert self.patch(client, location, 0, data).status_code == 204
+        return location.rsplit('/', 1)[-1]
+
+    def test_upload_resumes_from_offset(self, client):
+        """Test that an interrupted upload continues from the server's offset"""
+        data = b'%PDF-1.4 ' + b'x' * 1000
+        response = self.start_upload(client, 'degree.pdf', len(data))
+        assert response.status_code == 201
+        assert response.headers['Tus-Resumable'] == '1.0.0'
+        location = response.headers['Location']
+
+        assert self.patch(client, location, 0, data[:400]).headers['Upload-Offset'] == '400'
+        assert client.head(location).headers['Upload-Offset'] == '400'
+        # A client that lost track of the offset is told where to resume
+        conflict = self.patch(client, location, 0, data)
+        assert conflict.status_code == 409
+        assert conflict.headers['Upload-Offset'] == '400'
+
+        assert self.patch(client, location, 400, data[400:]).status_code == 204
+        with app.app_context():
+            upload = db.session.get(UploadSession, location.rsplit('/', 1)[-1])
+            assert upload.offset == upload.length
+            assert upload.sha256 == hashlib.sha256(data).hexdigest()
+
+    def test_upload_rejects_bad_files(self, client):
+        """Test that uploads are refused by extension, signature and declared size"""
+        assert self.start_upload(client, 'virus.exe', 10).status_code == 415
+        assert self.start_upload(client, 'huge.pdf', app.config['UPLOAD_MAX_FILE_BYTES'] + 1).status_code == 413
+
+        location = self.start_upload(client, 'fake.pdf', 20).headers['Location']
+        assert self.patch(client, location, 0, b'GIF89a not a pdf').status_code == 415
+        assert client.head(location).status_code == 404
+
+        location = self.start_upload(client, 'short.pdf', 10).headers['Location']
+        assert self.patch(client, location, 0, b'%PDF' + b'0' * 20).status_code == 413
+
+    def test_apply_with_uploaded_document_ids(self, client, sample_application_data):
+        """Test that the application can reference completed uploads instead of file bytes"""
+        data = sample_application_data.copy()
+        data['degree_certificate_upload'] = self.upload(client, 'degree.pdf', b'%PDF-1.4 degree')
+        data['id_proof_upload'] = self.upload(client, 'id.png', b'\x89PNG\r\n\x1a\n id')
+
+        response = client.post('/apply', data=data)
+        assert response.status_code == 302
+        with app.app_context():
+            application = Application.query.one()
+            assert application.id_proof.endswith('_id_id.png')
+            assert storage.exists(document_key(application.degree_certificate_document))
+            assert UploadSession.query.count() == 0
+
+    def test_apply_retries_after_rollback_with_same_uploads(self, client, sample_application_data, monkeypatch):
+        """Test that a submission that fails to commit keeps its uploads for the retry"""
+        data = sample_application_data.copy()
+        data['degree_certificate_upload'] = self.upload(client, 'degree.pdf', b'%PDF-1.4 degree')
+        data['id_proof_upload'] = self.upload(client, 'id.pdf', b'%PDF-1.4 id')
+
+        def fail_commit():
+            raise RuntimeError('database went away')
+        with monkeypatch.context() as patch:
+            patch.setattr(db.session, 'commit', fail_commit)
+            response = client.post('/apply', data=data)
+        assert b'An error occurred while submitting' in response.data
+        with app.app_context():
+            assert UploadSession.query.count() == 2
+            for upload in UploadSession.query:
+                assert os.path.exists(os.path.join(app.config['UPLOAD_FOLDER'], f'.resumable-{upload.id}'))
+
+        assert client.post('/apply', data=data).status_code == 302
+        with app.app_context():
+            assert Application.query.count() == 1
+            assert UploadSession.query.count() == 0
+        assert not [f for f in os.listdir(app.config['UPLOAD_FOLDER']) if f.startswith('.resumable-')]
+
+    def test_apply_rejects_incomplete_upload(self, client, sample_application_data):
+        """Test that an unfinished upload cannot be submitted"""
+        data = sample_application_data.copy()
+        location = self.start_upload(client, 'degree.pdf', 100).headers['Location']
+        data['degree_certificate_upload'] = location.rsplit('/', 1)[-1]
+        data['id_proof_upload'] = self.upload(client, 'id.pdf', b'%PDF-1.4 id')
+
+        response = client.post('/apply', data=data)
+        assert response.status_code == 200
+        assert b'missing or incomplete' in response.data
+
 class TestAdminFunctionality:
     """Test admin functionality"""
     
@@ -203,6 +713,520 @@ class TestApplicationManagement:
             application = Application.query.get(app_id)
             assert application.status == 'rejected'
 
+class TestLetterJobs:
+    """Test background admission letter generation"""
+
+    def test_approval_commits_before_letter_is_ready(self, client):
+        """Test that approval returns immediately and the letter arrives via the queue"""
+        letter_queue.eager = False
+        try:
+            with app.app_context():
+                app_id = create_application('JOB123').id
+
+            response = client.get(f'/admin/approve/{app_id}')
+            assert response.status_code == 302
+            letter_queue.join(timeout=30)
+
+            with app.app_context():
+                application = db.session.get(Application, app_id)
+                job = LetterJob.query.filter_by(application_id=app_id).one()
+                assert application.status == 'approved'
+                assert application.admission_letter_path is not None
+                assert job.status == 'done'
+                assert job.attempts == 1
+        finally:
+            letter_queue.eager = True
+
+    def test_download_reports_letter_being_prepared(self, client, monkeypatch):
+        """Test that downloads before the job finishes say the letter is being prepared"""
+        monkeypatch.setitem(app.config, 'LETTER_RENDER_ON_DEMAND', False)
+        with app.app_context():
+            application = create_application('JOB456', status='approved')
+            db.session.add(LetterJob(application_id=application.id))
+            db.session.commit()
+            app_id = application.id
+
+        response = client.get(f'/download_letter/{app_id}', follow_redirects=True)
+        assert b'being prepared' in response.data
+
+    def test_failed_job_is_marked_failed_after_retries(self, client, monkeypatch):
+        """Test that a job that keeps failing ends in the failed state"""
+        def broken_letter(application):
+            raise RuntimeError('reportlab exploded')
+        monkeypatch.setattr('app.generate_admission_letter', broken_letter)
+        monkeypatch.setattr(letter_queue, 'retry_delay', 0)
+
+        with app.app_context():
+            app_id = create_application('JOB789').id
+        client.get(f'/admin/approve/{app_id}')
+
+        with app.app_context():
+            job = LetterJob.query.filter_by(application_id=app_id).one()
+            assert job.status == 'failed'
+            assert job.attempts == letter_queue.max_attempts
+            assert 'reportlab exploded' in job.error
+
+class TestBatchLetterRendering:
+    """Test the parallel render-letters command"""
+
+    def test_render_letters_command(self, client):
+        """Test that approved applications get letters written and recorded"""
+        with app.app_context():
+            for i in range(3):
+                create_application(f'BATCH{i}', status='approved')
+            create_application('BATCHPENDING')
+
+        result = app.test_cli_runner().invoke(args=['render-letters', '--workers', '2', '--chunk-size', '2'])
+        assert result.exit_code == 0, result.output
+        assert 'Rendered 3 letters' in result.output
+        assert 'letters/sec' in result.output
+
+        with app.app_context():
+            for application in Application.query.filter_by(status='approved'):
+                assert application.admission_letter_path == f'admission_letter_{application.application_id}.pdf'
+                with storage.open(application.admission_letter_path) as f:
+                    assert f.read(4) == b'%PDF'
+            assert Application.query.filter_by(application_id='BATCHPENDING').one().admission_letter_path is None
+
+class TestLetterTemplate:
+    """Test the cached admission letter template"""
+
+    def test_template_is_reused_and_escapes_markup(self):
+        """Test that repeated renders share one template and tolerate markup characters"""
+        fields = {
+            'application_id': 'TPL123', 'first_name': 'Ann & <Bo>', 'last_name': "O'Brien",
+            'email': 'ann@test.com', 'phone': '1234567890', 'program': 'arts', 'gpa': 3.1,
+        }
+        first = render_admission_letter(fields)
+        second = render_admission_letter(dict(fields, application_id='TPL456'))
+        assert first.startswith(b'%PDF') and second.startswith(b'%PDF')
+        assert get_letter_template.cache_info().currsize == 1
+
+class TestLetterDownloads:
+    """Test in-memory letter rendering and caching"""
+
+    def test_download_renders_on_demand_without_disk(self, client):
+        """Test that a letter whose file was wiped is rendered in memory and cached"""
+        with app.app_context():
+            application = create_application('MEM123', status='approved',
+                                             admission_letter_path='admission_letter_gone.pdf')
+            app_id = application.id
+
+        response = client.get(f'/download_letter/{app_id}')
+        assert response.status_code == 200
+        assert response.mimetype == 'application/pdf'
+        assert response.data.startswith(b'%PDF')
+        assert len(letter_cache.memory) == 1
+
+        # Second download is served from the cache without rendering
+        with app.app_context():
+            cached = letter_cache.get(f'{app_id}:{LETTER_TEMPLATE_VERSION}')
+        assert client.get(f'/download_letter/{app_id}').data == cached
+
+    def test_memory_cache_evicts_least_recently_used(self):
+        """Test that the memory tier stays within its byte budget"""
+        cache = MemoryCache(max_bytes=10)
+        cache.set('a', b'1234')
+        cache.set('b', b'1234')
+        cache.get('a')
+        cache.set('c', b'1234')
+        assert cache.get('b') is None
+        assert cache.get('a') == b'1234'
+        assert cache.current_bytes == 8
+
+    def test_disk_tier_survives_memory_loss(self, tmp_path):
+        """Test that disk hits are promoted back into memory"""
+        cache = TieredCache(MemoryCache(max_bytes=100), DiskCache(str(tmp_path), max_bytes=100))
+        cache.set('letter', b'pdf-bytes')
+        cache.memory.clear()
+        assert cache.get('letter') == b'pdf-bytes'
+        assert cache.memory.get('letter') == b'pdf-bytes'
+
+class TestStatusCache:
+    """Test caching of the public status page"""
+
+    def count_renders(self, monkeypatch):
+        import app as app_module
+        renders = []
+        render = app_module.render_status_card
+        monkeypatch.setattr('app.render_status_card', lambda application_id: renders.append(application_id) or render(application_id))
+        return renders
+
+    def test_refreshes_are_served_from_cache(self, client, monkeypatch):
+        """Test that repeated status checks render and query once"""
+        create_application('APPCACHED')
+        renders = self.count_renders(monkeypatch)
+        for _ in range(5):
+            response = client.get('/status/APPCACHED')
+            assert response.status_code == 200
+            assert b'Pending Review' in response.data
+        assert renders == ['APPCACHED']
+
+    def test_flashed_messages_are_not_cached(self, client, sample_application_data):
+        """Test that the per-visitor flash around the cached card is not replayed"""
+        data = dict(sample_application_data, degree_certificate=(BytesIO(b'%PDF-1.4 degree'), 'degree.pdf'),
+                    id_proof=(BytesIO(b'%PDF-1.4 id'), 'id.pdf'))
+        response = client.post('/apply', data=data, content_type='multipart/form-data', follow_redirects=True)
+        assert b'submitted successfully' in response.data
+        response = client.get(f'/status/{Application.query.one().application_id}')
+        assert b'Pending Review' in response.data
+        assert b'submitted successfully' not in response.data
+
+    def test_decisions_invalidate_cached_status(self, client):
+        """Test that approve, reject and bulk decisions refresh the cached card"""
+        approved = create_application('APPAPPROVE').id
+        rejected = create_application('APPREJECT').id
+        bulk = create_application('APPBULK').id
+        for application_id in ('APPAPPROVE', 'APPREJECT', 'APPBULK'):
+            assert b'Pending Review' in client.get(f'/status/{application_id}').data
+
+        client.get(f'/admin/approve/{approved}')
+        client.get(f'/admin/reject/{rejected}')
+        client.post('/admin/applications/bulk', json={'action': 'approve', 'ids': [bulk]})
+        assert b'Download Admission Letter' in client.get('/status/APPAPPROVE').data
+        assert b'Rejected' in client.get('/status/APPREJECT').data
+        assert b'Download Admission Letter' in client.get('/status/APPBULK').data
+
+    def test_cache_hits_skip_the_database(self, client):
+        """Test that a cached status page, and its revalidation, run no queries"""
+        create_application('APPNOQUERY')
+        response = client.get('/status/APPNOQUERY')
+        assert '"1 queries"' in response.headers['Server-Timing']
+        assert '"0 queries"' in client.get('/status/APPNOQUERY').headers['Server-Timing']
+        revalidated = client.get('/status/APPNOQUERY', headers={'If-None-Match': response.headers['ETag']})
+        assert revalidated.status_code == 304
+        assert '"0 queries"' in revalidated.headers['Server-Timing']
+
+    def test_change_made_by_another_worker(self, client):
+        """Test that the live-update reload is never served a card older than the version it was told about"""
+        application = create_application('APPOTHER')
+        assert b'Pending Review' in client.get('/status/APPOTHER').data
+
+        # Another worker approves: this process's cache is not told
+        application.status = 'approved'
+        db.session.commit()
+        assert b'Pending Review' in client.get('/status/APPOTHER').data  # until STATUS_CACHE_TTL
+        response = client.get('/status/APPOTHER?version=2')
+        assert b'Pending Review' not in response.data
+        assert response.headers['ETag'] == 'W/"APPOTHER-2"'
+        assert client.get('/status/APPOTHER', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+    def test_memory_cache_ttl(self, monkeypatch):
+        """Test that entries expire after their TTL"""
+        now = [1000.0]
+        monkeypatch.setattr('cache.time.monotonic', lambda: now[0])
+        cache = MemoryCache(max_bytes=100, ttl=60)
+        cache.set('a', b'card')
+        now[0] += 59
+        assert cache.get('a') == b'card'
+        now[0] += 2
+        assert cache.get('a') is None
+        assert cache.current_bytes == 0
+
+    def test_single_flight(self):
+        """Test that concurrent misses for one key compute it once"""
+        import threading
+        cache = MemoryCache(max_bytes=100)
+        flight = SingleFlight()
+        calls = []
+        started = threading.Event()
+
+        def compute():
+            calls.append(1)
+            started.wait(1)
+            return b'card'
+
+        threads = [threading.Thread(target=flight.get_or_set, args=(cache, 'key', compute)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        started.set()
+        for thread in threads:
+            thread.join()
+        assert calls == [1]
+        assert cache.get('key') == b'card'
+        assert flight.get_or_set(cache, 'missing', lambda: None) is None
+        assert cache.get('missing') is None
+
+    def test_redis_cache(self):
+        """Test the Redis backend against fakeredis"""
+        fakeredis = pytest.importorskip('fakeredis')
+        cache = RedisCache(fakeredis.FakeRedis(), prefix='status:', ttl=60)
+        cache.set('APP1', b'card')
+        assert cache.get('APP1') == b'card'
+        assert cache.client.ttl('status:APP1') == 60
+        cache.delete('APP1')
+        assert cache.get('APP1') is None
+        cache.set('APP2', b'card')
+        cache.clear()
+        assert cache.get('APP2') is None
+
+    def test_build_cache(self):
+        """Test selecting the cache backend from a URL"""
+        assert isinstance(build_cache('', 100, ttl=5), MemoryCache)
+        with pytest.raises(ValueError):
+            build_cache('memcached://localhost', 100)
+
+class TestStatusEvents:
+    """Test the live status channels"""
+
+    def decide_later(self, application_id, status, delay=0.2):
+        import threading
+
+        def decide():
+            time.sleep(delay)
+            with app.app_context():
+                application = Application.query.filter_by(application_id=application_id).one()
+                application.status = status
+                db.session.commit()
+                app_module.status_changed(application_id)
+
+        import app as app_module
+        thread = threading.Thread(target=decide)
+        thread.start()
+        return thread
+
+    def test_local_broker(self):
+        """Test fan-out to every subscriber of a channel and cleanup on close"""
+        broker = LocalBroker()
+        first, second, other = broker.subscribe('APP1'), broker.subscribe('APP1'), broker.subscribe('APP2')
+        assert broker.publish('APP1', {'n': 1}) == 2
+        assert first.get(timeout=0) == second.get(timeout=0) == {'n': 1}
+        assert other.get(timeout=0) is None
+        for subscription in (first, second, other):
+            subscription.close()
+        assert broker.subscriber_count() == 0
+        assert broker.publish('APP1', {'n': 2}) == 0
+
+    def test_sse_stream_pushes_decision(self, client, monkeypatch):
+        """Test that an open event stream receives the decision made elsewhere"""
+        monkeypatch.setitem(app.config, 'STATUS_EVENTS_MAX_SECONDS', 2)
+        create_application('APPSSE')
+        thread = self.decide_later('APPSSE', 'approved')
+        response = client.get('/status/APPSSE/events?version=1')
+        thread.join()
+        assert response.mimetype == 'text/event-stream'
+        body = response.get_data(as_text=True)
+        assert body.startswith('retry: ')
+        event = next(block for block in body.split('\n\n') if 'event: status' in block)
+        assert 'id: 2' in event
+        data = json.loads(event.split('data: ', 1)[1])
+        assert (data['status'], data['version']) == ('approved', 2)
+        response.close()
+        assert status_broker.subscriber_count() == 0
+
+    def test_sse_sends_current_status_to_stale_clients(self, client, monkeypatch):
+        """Test that a client behind the current version is told immediately"""
+        monkeypatch.setitem(app.config, 'STATUS_EVENTS_MAX_SECONDS', 0)
+        create_application('APPSTALE', status='rejected')
+        response = client.get('/status/APPSTALE/events', headers={'Last-Event-ID': '0'})
+        assert '"status": "rejected"' in response.get_data(as_text=True)
+        response.close()
+        assert client.get('/status/APPMISSING/events').status_code == 404
+
+    def test_long_poll(self, client, monkeypatch):
+        """Test that long-polling returns at once when behind, and waits for a change otherwise"""
+        monkeypatch.setitem(app.config, 'STATUS_EVENTS_MAX_SECONDS', 5)
+        create_application('APPPOLL')
+        assert client.get('/status/APPPOLL/poll').json['version'] == 1
+
+        thread = self.decide_later('APPPOLL', 'rejected')
+        started = time.monotonic()
+        data = client.get('/status/APPPOLL/poll?version=1').json
+        thread.join()
+        assert (data['status'], data['version']) == ('rejected', 2)
+        assert time.monotonic() - started < 4
+
+    def test_status_page_subscribes(self, client):
+        """Test that the status page opens an event stream for its version, only while it can still change"""
+        create_application('APPPAGE')
+        assert b'/status/APPPAGE/events?version=1' in client.get('/status/APPPAGE').data
+        create_application('APPSETTLED', status='rejected')
+        assert b'EventSource' not in client.get('/status/APPSETTLED').data
+
+    def test_settled_applications_end_live_updates(self, client):
+        """Test that an up-to-date client of a settled application is told to stop, and polls return at once"""
+        create_application('APPDONE', status='rejected')
+        assert client.get('/status/APPDONE/events?version=1').status_code == 204
+        started = time.monotonic()
+        assert client.get('/status/APPDONE/poll?version=1').json['settled'] is True
+        assert time.monotonic() - started < 1
+
+    def test_streams_are_capped_per_worker(self, client, monkeypatch):
+        """Test that streams and long-polls past STATUS_EVENTS_MAX_STREAMS get 503 with Retry-After"""
+        import threading
+        streams = threading.BoundedSemaphore(1)
+        monkeypatch.setattr('app.status_streams', streams)
+        monkeypatch.setitem(app.config, 'STATUS_EVENTS_MAX_SECONDS', 1)
+        create_application('APPBUSY')
+        streams.acquire()  # a stream open in another thread
+        for url in ('/status/APPBUSY/events?version=1', '/status/APPBUSY/poll?version=1'):
+            response = client.get(url)
+            assert response.status_code == 503
+            assert response.headers['Retry-After'] == '1'
+        streams.release()
+
+        assert client.get('/status/APPBUSY/poll').status_code == 200
+        response = client.get('/status/APPBUSY/events')
+        assert 'event: status' in response.get_data(as_text=True)
+        response.close()
+        assert streams.acquire(blocking=False)  # both gave their slot back
+
+    def test_gunicorn_runs_threaded_workers(self, monkeypatch):
+        """Test that gunicorn.conf.py keeps sync workers from being held by event streams"""
+        import runpy
+        monkeypatch.delenv('GUNICORN_THREADS', raising=False)
+        monkeypatch.setenv('GUNICORN_CMD_ARGS', '--threads 4')
+        monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', '')
+        settings = runpy.run_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gunicorn.conf.py'))
+        assert settings['worker_class'] == 'gthread'
+        assert settings['threads'] == 4
+        assert os.environ['GUNICORN_THREADS'] == '4'
+
+    def test_redis_broker(self):
+        """Test relaying messages through Redis pub/sub using fakeredis"""
+        fakeredis = pytest.importorskip('fakeredis')
+        broker = RedisBroker(fakeredis.FakeRedis())
+        with broker.subscribe('APP1') as subscription:
+            time.sleep(0.1)  # let the listener thread subscribe
+            broker.publish('APP1', {'application_id': 'APP1'})
+            assert subscription.get(timeout=2) == {'application_id': 'APP1'}
+
+class TestConditionalGet:
+    """Test ETag/Last-Modified revalidation of status and API resources"""
+
+    def test_status_page_revalidation(self, client, monkeypatch):
+        """Test that an unchanged status page answers 304 without rendering"""
+        application = create_application('APPETAG')
+        response = client.get('/status/APPETAG')
+        etag, last_modified = response.headers['ETag'], response.headers['Last-Modified']
+        assert etag.startswith('W/')
+
+        monkeypatch.setattr('app.render_status_card', lambda application_id: pytest.fail('rendered'))
+        response = client.get('/status/APPETAG', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        response = client.get('/status/APPETAG', headers={'If-Modified-Since': last_modified})
+        assert response.status_code == 304
+        monkeypatch.undo()
+
+        client.get(f'/admin/reject/{application.id}', follow_redirects=True)  # the dashboard shows the flash
+        response = client.get('/status/APPETAG', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+
+    def test_status_page_with_flash_is_not_revalidated(self, client, sample_application_data):
+        """Test that the page showing a flashed message is neither cached nor answered with 304"""
+        data = dict(sample_application_data, degree_certificate=(BytesIO(b'%PDF-1.4 degree'), 'degree.pdf'),
+                    id_proof=(BytesIO(b'%PDF-1.4 id'), 'id.pdf'))
+        client.post('/apply', data=data, content_type='multipart/form-data')
+        application_id = Application.query.one().application_id
+        response = client.get(f'/status/{application_id}', headers={'If-None-Match': f'W/"{application_id}-1"'})
+        assert response.status_code == 200
+        assert b'submitted successfully' in response.data
+        assert 'no-store' in response.headers['Cache-Control']
+        assert 'ETag' not in response.headers
+
+    def test_api_application_revalidation(self, client):
+        """Test that single-application API responses revalidate by row version"""
+        application = create_application('APPAPIETAG')
+        response = client.get(f'/api/applications/{application.id}')
+        etag = response.headers['ETag']
+        assert etag == f'"{application.id}-1"'
+        assert client.get(f'/api/applications/{application.id}', headers={'If-None-Match': etag}).status_code == 304
+
+        client.post('/admin/applications/bulk', json={'action': 'reject', 'ids': [application.id]})
+        response = client.get(f'/api/applications/{application.id}', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] == f'"{application.id}-2"'  # bulk UPDATEs bump the version too
+
+    def test_api_list_revalidation(self, client):
+        """Test that a page of the list API revalidates until a row on it changes"""
+        ids = [create_application(f'APPLIST{i}').id for i in range(3)]
+        response = client.get('/api/applications?limit=2')
+        etag = response.headers['ETag']
+        assert client.get('/api/applications?limit=2', headers={'If-None-Match': etag}).status_code == 304
+
+        client.get(f'/admin/approve/{ids[-1]}')
+        response = client.get('/api/applications?limit=2', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+        assert client.get('/api/applications?limit=2&fields=id', headers={'If-None-Match': response.headers['ETag']}).status_code == 200
+
+class TestBulkDecisions:
+    """Test bulk approve/reject"""
+
+    def test_bulk_approve_json(self, client):
+        """Test that a JSON bulk approval updates only pending rows and queues letters"""
+        with app.app_context():
+            ids = [create_application(f'BULK{i}').id for i in range(3)]
+            ids.append(create_application('BULKDONE', status='rejected').id)
+
+        response = client.post('/admin/applications/bulk', json={'action': 'approve', 'ids': ids})
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['updated'] == 3
+        assert data['ids'] == ids[:3]
+
+        with app.app_context():
+            statuses = {a.application_id: a.status for a in Application.query.all()}
+            assert statuses == {'BULK0': 'approved', 'BULK1': 'approved', 'BULK2': 'approved', 'BULKDONE': 'rejected'}
+            assert LetterJob.query.filter_by(status='done').count() == 3
+            assert all(a.reviewed_by == 'Admin' for a in Application.query.filter_by(status='approved'))
+
+    def test_bulk_skips_rows_decided_concurrently(self, client):
+        """Test that a row another reviewer decides mid-request gets no decision or letter job"""
+        from sqlalchemy import event
+        ids = [create_application(f'RACE{i}').id for i in range(3)]
+        other_reviewer = create_engine(app.config['SQLALCHEMY_DATABASE_URI'])
+
+        raced = []
+
+        def reject_first(connection, cursor, statement, parameters, context, executemany):
+            if statement.startswith('UPDATE application') and not raced:
+                raced.append(True)
+                with other_reviewer.begin() as other:
+                    other.execute(text("UPDATE application SET status = 'rejected' WHERE id = :id"), {'id': ids[0]})
+
+        event.listen(db.engine, 'before_cursor_execute', reject_first)
+        try:
+            response = client.post('/admin/applications/bulk', json={'action': 'approve', 'ids': ids})
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', reject_first)
+            other_reviewer.dispose()
+        assert response.get_json()['updated'] == 2
+        assert response.get_json()['ids'] == ids[1:]
+        assert sorted(job.application_id for job in LetterJob.query) == ids[1:]
+        assert db.session.get(Application, ids[0]).status == 'rejected'
+
+    def test_bulk_reject_form(self, client):
+        """Test the dashboard multi-select form"""
+        with app.app_context():
+            ids = [create_application(f'FORM{i}').id for i in range(2)]
+
+        response = client.post('/admin/applications/bulk', data={'action': 'reject', 'ids': ids})
+        assert response.status_code == 302
+        with app.app_context():
+            assert Application.query.filter_by(status='rejected').count() == 2
+            assert LetterJob.query.count() == 0
+
+    def test_bulk_rejects_bad_requests(self, client):
+        """Test that missing ids, bad actions and oversized batches are refused"""
+        assert client.post('/admin/applications/bulk', json={'action': 'approve', 'ids': []}).status_code == 400
+        assert client.post('/admin/applications/bulk', json={'action': 'delete', 'ids': [1]}).status_code == 400
+        too_many = list(range(app.config['BULK_DECISION_MAX_IDS'] + 1))
+        assert client.post('/admin/applications/bulk', json={'action': 'approve', 'ids': too_many}).status_code == 400
+
+    def test_bulk_rejects_malformed_json(self, client):
+        """Test that a non-object body or non-list ids are refused rather than misread"""
+        ids = [create_application(f'SHAPE{i}').id for i in range(2)]
+        response = client.post('/admin/applications/bulk', json=ids)
+        assert response.status_code == 400
+        assert 'error' in response.get_json()
+
+        # A string must not be read one character (one id) at a time
+        response = client.post('/admin/applications/bulk', json={'action': 'approve', 'ids': ''.join(map(str, ids))})
+        assert response.status_code == 400
+        assert Application.query.filter_by(status='pending').count() == 2
+
 class TestAPIEndpoints:
     """Test API endpoints"""
     
@@ -261,8 +1285,106 @@ class TestAPIEndpoints:
         assert data['application_id'] == 'SINGLE123'
         assert data['first_name'] == 'Single'
 
+    def test_applications_api_cursor_pagination(self, client):
+        """Test that the API pages through rows with the X-Next-Cursor header"""
+        with app.app_context():
+            for i in range(5):
+                create_application(f'SYNC{i}', submitted_at=datetime(2024, 1, 1, 12, i))
+
+        seen = []
+        response = client.get('/api/applications?limit=2')
+        while True:
+            assert response.status_code == 200
+            seen.extend(row['application_id'] for row in response.get_json())
+            cursor = response.headers.get('X-Next-Cursor')
+            if not cursor:
+                break
+            assert 'rel="next"' in response.headers['Link']
+            response = client.get(f'/api/applications?limit=2&cursor={cursor}')
+        assert seen == ['SYNC4', 'SYNC3', 'SYNC2', 'SYNC1', 'SYNC0']
+
+    def test_applications_api_fields_and_filters(self, client):
+        """Test field projection and status/program/date filters"""
+        with app.app_context():
+            create_application('FILTER1', status='approved', program='arts', submitted_at=datetime(2024, 3, 1))
+            create_application('FILTER2', status='approved', program='science', submitted_at=datetime(2024, 3, 2))
+            create_application('FILTER3', status='pending', program='arts', submitted_at=datetime(2024, 1, 1))
+
+        response = client.get('/api/applications?status=approved&program=arts&fields=application_id,gpa')
+        assert response.get_json() == [{'application_id': 'FILTER1', 'gpa': 3.5}]
+
+        response = client.get('/api/applications?submitted_from=2024-02-01&submitted_to=2024-03-02&fields=application_id')
+        assert response.get_json() == [{'application_id': 'FILTER1'}]
+
+    def test_applications_api_rejects_bad_parameters(self, client):
+        """Test that unknown fields and bad cursors return 400"""
+        assert client.get('/api/applications?fields=password').status_code == 400
+        assert client.get('/api/applications?cursor=bogus').status_code == 400
+        assert client.get('/api/applications?submitted_from=yesterday').status_code == 400
+
+class TestExport:
+    """Test the streaming bulk export endpoint"""
+
+    def test_export_ndjson(self, client):
+        """Test that NDJSON export streams one object per line"""
+        with app.app_context():
+            create_application('EXPORT1')
+            create_application('EXPORT2', status='approved')
+
+        response = client.get('/api/applications/export?fields=application_id,status')
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        lines = [json.loads(line) for line in response.data.decode().splitlines()]
+        assert lines == [
+            {'application_id': 'EXPORT1', 'status': 'pending'},
+            {'application_id': 'EXPORT2', 'status': 'approved'},
+        ]
+
+    def test_export_csv_gzip(self, client):
+        """Test that CSV export is gzip-compressed when the client accepts it"""
+        with app.app_context():
+            create_application('EXPORT3', program='arts')
+
+        response = client.get('/api/applications/export?format=csv&program=arts',
+                              headers={'Accept-Encoding': 'gzip'})
+        assert response.status_code == 200
+        assert response.headers['Content-Encoding'] == 'gzip'
+        rows = list(csv.reader(gzip.decompress(response.data).decode().splitlines()))
+        assert rows[0][:2] == ['id', 'application_id']
+        assert rows[1][1] == 'EXPORT3'
+        assert len(rows) == 2
+
+    def test_export_starts_immediately(self, client):
+        """Test that the CSV header reaches the client, compressed, before any rows are fetched"""
+        from app import export_lines, chunk_lines, gzip_chunks
+        create_application('EXPORT4')
+        fetched = []
+        query = Application.query.order_by(Application.id)
+        yield_per = query.yield_per
+        query.yield_per = lambda n: fetched.append(n) or yield_per(n)
+
+        body = gzip_chunks(chunk_lines(export_lines(query, ('id', 'application_id'), 'csv')))
+        first = next(body)
+        assert fetched == []
+        assert zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(first) == b'id,application_id\r\n'
+        rest = b''.join(body)
+        assert b'EXPORT4' in gzip.decompress(first + rest)
+
+    def test_export_rejects_unknown_format(self, client):
+        """Test that unsupported formats return 400"""
+        assert client.get('/api/applications/export?format=xml').status_code == 400
+
 class TestApplicationStatus:
     """Test application status checking"""
+
+    def test_approved_letter_available_before_job_finishes(self, client):
+        """Test that an approved application offers its letter even before the job has stored it"""
+        application = create_application('APPNOLETTER', status='approved')
+        page = client.get('/status/APPNOLETTER').data
+        assert b'Download Admission Letter' in page
+        assert f'/download_letter/{application.id}'.encode() in page
+        response = client.get(f'/download_letter/{application.id}')
+        assert response.mimetype == 'application/pdf'
     
     def test_application_status_page(self, client, sample_application_data):
         """Test application status page"""
@@ -295,5 +1417,423 @@ class TestApplicationStatus:
         response = client.get('/status/INVALID123')
         assert response.status_code == 302  # Should redirect to home
 
+class TestDashboardPagination:
+    """Test keyset pagination on the admin dashboard"""
+
+    def test_dashboard_pages_are_bounded(self, client):
+        """Test that the dashboard only renders one page of applications"""
+        with app.app_context():
+            for i in range(5):
+                create_application(f'PAGE{i}', submitted_at=datetime(2024, 1, 1, 12, i))
+
+        response = client.get('/admin/dashboard?per_page=2')
+        assert response.status_code == 200
+        assert b'PAGE4' in response.data
+        assert b'PAGE3' in response.data
+        assert b'PAGE2' not in response.data
+        assert b'after=' in response.data
+
+    def test_keyset_page_walks_forward_and_back(self, client):
+        """Test that next and prev cursors visit every row exactly once"""
+        with app.app_context():
+            same_time = datetime(2024, 1, 1, 12, 0)
+            for i in range(5):
+                create_application(f'WALK{i}', submitted_at=same_time)
+
+            seen = []
+            rows, next_cursor, prev_cursor = keyset_page(Application.query, limit=2)
+            assert prev_cursor is None
+            seen.extend(r.application_id for r in rows)
+            while next_cursor:
+                rows, next_cursor, prev_cursor = keyset_page(Application.query, after=next_cursor, limit=2)
+                seen.extend(r.application_id for r in rows)
+            assert seen == ['WALK4', 'WALK3', 'WALK2', 'WALK1', 'WALK0']
+
+            rows, _, prev_cursor = keyset_page(Application.query, before=prev_cursor, limit=2)
+            assert [r.application_id for r in rows] == ['WALK2', 'WALK1']
+            assert prev_cursor is not None
+
+    def test_status_counts_cover_all_pages(self, client):
+        """Test that the stats cards count every row, not just the current page"""
+        with app.app_context():
+            create_application('COUNT1')
+            create_application('COUNT2', status='approved')
+            create_application('COUNT3', status='approved')
+            create_application('COUNT4', status='rejected')
+            assert get_status_counts() == {'pending': 1, 'approved': 2, 'rejected': 1, 'total': 4}
+
+        response = client.get('/admin/dashboard?per_page=1')
+        assert response.status_code == 200
+        assert b'<h5 class="card-title">4</h5>' in response.data
+        assert b'<h5 class="card-title">2</h5>' in response.data
+
+    def test_invalid_cursor_redirects(self, client):
+        """Test that a malformed cursor falls back to the first page"""
+        response = client.get('/admin/dashboard?after=not-a-cursor')
+        assert response.status_code == 302
+
+class TestQueryStats:
+    """Test per-request SQL instrumentation and query budgets"""
+
+    def test_server_timing_header(self, client):
+        """Test that responses report database time and query count"""
+        create_application('APPTIMING')
+        timing = client.get('/admin/dashboard').headers['Server-Timing']
+        assert timing.startswith('db;dur=')
+        assert 'desc="2 queries"' in timing
+        assert 'app;dur=' in timing
+
+    def test_routes_stay_within_budget(self, client):
+        """Test that read views issue a fixed number of queries however many rows they show"""
+        for i in range(60):
+            create_application(f'APPBUDGET{i:03d}', status='approved' if i % 2 else 'pending')
+        application = Application.query.filter_by(application_id='APPBUDGET001').one()
+        for url in ('/admin/dashboard', f'/admin/application/{application.id}', '/status/APPBUDGET001',
+                    '/api/applications?per_page=50', f'/api/applications/{application.id}'):
+            assert client.get(url).status_code == 200
+
+    def test_budget_exceeded_fails_under_testing(self, client, monkeypatch):
+        """Test that a view issuing more queries than its budget raises in tests"""
+        create_application('APPOVER')
+        monkeypatch.setattr(app.view_functions['admin_dashboard'], 'query_budget', 1)
+        with pytest.raises(QueryBudgetExceeded, match='admin_dashboard issued 2 queries'):
+            client.get('/admin/dashboard')
+
+    def test_repeated_statements(self):
+        """Test counting the statements a request repeats"""
+        stats = QueryStats()
+        for i in range(12):
+            stats.record('SELECT * FROM document WHERE id = ?', 0.001)
+        stats.record('SELECT * FROM application', 0.05)
+        assert stats.count == 13
+        assert stats.slowest_statement == 'SELECT * FROM application'
+        assert stats.repeated(10) == [('SELECT * FROM document WHERE id = ?', 12)]
+
+    def test_slow_query_logged(self, caplog):
+        """Test that statements over the threshold are logged outside requests too"""
+        engine = create_engine('sqlite://')
+        query_stats.install(engine, slow_query_ms=0)
+        with caplog.at_level('WARNING', logger='query_stats'):
+            with engine.connect() as connection:
+                connection.execute(text('SELECT 1'))
+        assert any('Slow query' in r.message and 'background' in r.message and 'SELECT 1' in r.message
+                   for r in caplog.records)
+        engine.dispose()
+
+class TestMetrics:
+    """Test the Prometheus metrics"""
+
+    def sample(self, name, **labels):
+        return metrics.REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_request_latency_and_in_progress(self, client):
+        """Test that each request is timed per endpoint and status, and leaves the in-progress gauge at zero"""
+        labels = dict(endpoint='admin_dashboard', method='GET', status='200')
+        before = self.sample('http_request_duration_seconds_count', **labels)
+        client.get('/admin/dashboard')
+        assert self.sample('http_request_duration_seconds_count', **labels) == before + 1
+        assert self.sample('http_requests_in_progress', endpoint='admin_dashboard') == 0
+
+        client.get('/no/such/page')
+        assert self.sample('http_request_duration_seconds_count', endpoint='unmatched', method='GET', status='302') >= 1
+
+    def test_metrics_endpoint(self, client):
+        """Test the exposition format served on /metrics"""
+        client.get('/health')
+        response = client.get('/metrics')
+        assert response.status_code == 200
+        assert response.mimetype == 'text/plain'
+        body = response.get_data(as_text=True)
+        assert 'http_request_duration_seconds_bucket{endpoint="health_check"' in body
+        assert 'db_pool_checkouts_total' in body
+        assert 'job_queue_depth' in body
+
+    def test_upload_bytes_and_letter_render(self, client, sample_application_data):
+        """Test counting uploaded document bytes and timing on-demand letter rendering"""
+        before = self.sample('upload_bytes_total', source='form')
+        data = dict(sample_application_data, degree_certificate=(BytesIO(b'%PDF-1.4 degree'), 'degree.pdf'),
+                    id_proof=(BytesIO(b'%PDF-1.4 identity'), 'id.pdf'))
+        assert client.post('/apply', data=data, content_type='multipart/form-data').status_code == 302
+        assert self.sample('upload_bytes_total', source='form') == before + len(b'%PDF-1.4 degree%PDF-1.4 identity')
+
+        renders = self.sample('letter_render_duration_seconds_count', trigger='on_demand')
+        application = create_application('APPMETRICS', status='approved', admission_letter_path='gone.pdf')
+        assert client.get(f'/download_letter/{application.id}').status_code == 200
+        assert self.sample('letter_render_duration_seconds_count', trigger='on_demand') == renders + 1
+
+    def test_queue_depth_gauge(self):
+        """Test that a queue reports jobs as they are queued and finish"""
+        import threading
+        gauge = metrics.job_queue_depth.labels('test')
+        queue = JobQueue('test', max_workers=1, depth_gauge=gauge)
+        release = threading.Event()
+        queue.submit(release.wait)
+        queue.submit(release.wait)
+        assert self.sample('job_queue_depth', queue='test') == 2
+        release.set()
+        queue.join(timeout=5)
+        deadline = time.monotonic() + 5
+        while self.sample('job_queue_depth', queue='test') and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert self.sample('job_queue_depth', queue='test') == 0
+
+    def test_pool_metrics(self):
+        """Test that pool checkouts and connections are exported"""
+        engine = create_engine('sqlite://', poolclass=QueuePool)
+        checkouts = self.sample('db_pool_checkouts_total')
+        metrics.PrometheusPoolMetrics().install(engine)
+        with engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+            assert self.sample('db_pool_checked_out') >= 1
+        assert self.sample('db_pool_checkouts_total') == checkouts + 1
+        engine.dispose()
+
+    def test_multiprocess_aggregation(self, tmp_path):
+        """Test that /metrics merges the values written by separate worker processes"""
+        import subprocess
+        import sys
+        from prometheus_client import CollectorRegistry, multiprocess
+        worker = ("import metrics; metrics.upload_bytes.labels('form').inc(100); "
+                  "metrics.job_queue_depth.labels('letters').inc(3)")
+        env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path))
+        for _ in range(2):
+            subprocess.run([sys.executable, '-c', worker], env=env, check=True, cwd=os.path.dirname(__file__) or '.')
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry, path=str(tmp_path))
+        assert registry.get_sample_value('upload_bytes_total', {'source': 'form'}) == 200
+        # Exited workers drop out of livesum gauges once gunicorn marks them dead
+        for pid_file in tmp_path.glob('gauge_livesum_*.db'):
+            multiprocess.mark_process_dead(int(pid_file.stem.rsplit('_', 1)[1]), path=str(tmp_path))
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry, path=str(tmp_path))
+        assert not registry.get_sample_value('job_queue_depth', {'queue': 'letters'})
+
+class TestSQLiteProfile:
+    """Test the SQLite connection pragmas"""
+
+    def test_profile_applied_on_connect(self, tmp_path):
+        """Test that every new connection gets WAL, NORMAL sync, a busy timeout and a larger cache"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'tuned.db'}")
+        assert apply_sqlite_profile(engine, sqlite_pragmas(app.config))
+        with engine.connect() as connection:
+            pragmas = read_pragmas(connection, ['journal_mode', 'synchronous', 'busy_timeout', 'cache_size', 'mmap_size'])
+        assert pragmas == {
+            'journal_mode': 'wal',
+            'synchronous': 1,  # NORMAL
+            'busy_timeout': app.config['SQLITE_BUSY_TIMEOUT_MS'],
+            'cache_size': -app.config['SQLITE_CACHE_SIZE_KB'],
+            'mmap_size': app.config['SQLITE_MMAP_SIZE'],
+        }
+        engine.dispose()
+
+    def test_app_engine_uses_profile(self, client):
+        """Test that the app's own engine is tuned and reports it on /debug"""
+        response = client.get('/debug')
+        assert response.json['sqlite_pragmas']['journal_mode'] == 'wal'
+        assert response.json['sqlite_pragmas']['busy_timeout'] == app.config['SQLITE_BUSY_TIMEOUT_MS']
+
+    def test_concurrent_writers(self, tmp_path):
+        """Test that concurrent writers wait for each other instead of failing"""
+        import threading
+        engine = create_engine(f"sqlite:///{tmp_path / 'concurrent.db'}")
+        apply_sqlite_profile(engine, sqlite_pragmas(app.config))
+        with engine.begin() as connection:
+            connection.exec_driver_sql("CREATE TABLE submission (id INTEGER PRIMARY KEY, worker INTEGER)")
+        errors = []
+
+        def write(worker):
+            try:
+                for _ in range(25):
+                    with engine.begin() as connection:
+                        connection.exec_driver_sql("SELECT COUNT(*) FROM submission").scalar()
+                        connection.exec_driver_sql(f"INSERT INTO submission (worker) VALUES ({worker})")
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == []
+        with engine.connect() as connection:
+            assert connection.exec_driver_sql("SELECT COUNT(*) FROM submission").scalar() == 100
+        engine.dispose()
+
+class TestConnectionPool:
+    """Test connection pool sizing and metrics"""
+
+    def pool_config(self, **overrides):
+        config = {key: app.config[key] for key in (
+            'DB_MAX_CONNECTIONS', 'DB_POOL_SIZE', 'DB_MAX_OVERFLOW', 'DB_POOL_TIMEOUT', 'DB_POOL_RECYCLE',
+            'DB_POOL_PRE_PING', 'PGBOUNCER_MODE', 'GUNICORN_THREADS', 'DB_BACKGROUND_THREADS')}
+        config.update(SQLALCHEMY_DATABASE_URI='postgresql://u:p@db/admissions', GUNICORN_WORKERS=4)
+        config.update(overrides)
+        return config
+
+    def test_pool_sized_from_worker_count(self):
+        """Test that the connection budget is split across gunicorn workers"""
+        assert pool_sizing(20, workers=4, threads=1, background_threads=3) == (4, 1)
+        assert pool_sizing(20, workers=1, threads=8, background_threads=3) == (11, 9)
+        assert pool_sizing(4, workers=8, threads=4) == (1, 0)  # never below one connection
+
+        options = engine_options(self.pool_config(DB_MAX_CONNECTIONS=40, GUNICORN_THREADS=2, DB_BACKGROUND_THREADS=3))
+        assert (options['pool_size'], options['max_overflow']) == (5, 5)
+        assert options['pool_pre_ping'] and options['pool_use_lifo']
+        options = engine_options(self.pool_config(DB_POOL_SIZE=2, DB_MAX_OVERFLOW=0))
+        assert (options['pool_size'], options['max_overflow']) == (2, 0)
+
+    def test_gunicorn_worker_count(self):
+        """Test reading the worker count the way gunicorn does"""
+        assert gunicorn_workers({}) == 1
+        assert gunicorn_workers({'WEB_CONCURRENCY': '3'}) == 3
+        assert gunicorn_workers({'GUNICORN_CMD_ARGS': '--bind 0.0.0.0:80 -w 6'}) == 6
+        assert gunicorn_workers({'GUNICORN_CMD_ARGS': '--workers=5'}) == 5
+
+    def test_pgbouncer_transaction_mode(self):
+        """Test that PgBouncer transaction pooling disables the app-side pool"""
+        from sqlalchemy.pool import NullPool
+        options = engine_options(self.pool_config(PGBOUNCER_MODE='transaction'))
+        assert options == {'poolclass': NullPool}
+        options = engine_options(self.pool_config(
+            PGBOUNCER_MODE='transaction', SQLALCHEMY_DATABASE_URI='postgresql+psycopg://u:p@db/admissions'))
+        assert options['connect_args'] == {'prepare_threshold': None}
+
+    def test_render_database_url(self):
+        """Test that Render's postgres:// URLs are accepted"""
+        assert normalize_database_url('postgres://u:p@db/x') == 'postgresql://u:p@db/x'
+        assert normalize_database_url('sqlite:///admissions.db') == 'sqlite:///admissions.db'
+
+    def test_pool_metrics(self, tmp_path):
+        """Test that checkouts, hold times and checkout timeouts are counted"""
+        from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+        metrics = PoolMetrics()
+        options = engine_options(self.pool_config(
+            SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'pool.db'}"), metrics)
+        engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", pool_size=1, max_overflow=0, pool_timeout=0.05, **options)
+        metrics.install(engine)
+        with engine.connect() as connection:
+            connection.exec_driver_sql("SELECT 1")
+            assert metrics.snapshot(engine)['checked_out'] == 1
+            with pytest.raises(PoolTimeoutError):
+                engine.connect()
+        stats = metrics.snapshot(engine)
+        assert stats['checkouts'] == 1
+        assert stats['connects'] == 1
+        assert stats['checked_out'] == 0
+        assert stats['timeouts'] == 1
+        assert stats['wait_seconds_max'] >= 0.05
+        assert stats['pool_class'] == 'MeteredQueuePool'
+        engine.dispose()
+
+    def test_debug_reports_pool(self, client):
+        """Test that the app's pool metrics are exposed on /debug"""
+        stats = client.get('/debug').json['db_pool']
+        assert stats['checkouts'] > 0
+
+class TestReplicaRouting:
+    """Test routing read-only views to a read replica"""
+
+    @pytest.fixture
+    def replica(self, client, tmp_path, monkeypatch):
+        engine = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+        db.metadata.create_all(engine)
+        monkeypatch.setitem(db.engines, REPLICA_BIND, engine)
+        yield engine
+        engine.dispose()
+
+    def insert_on_replica(self, engine, application_id):
+        with engine.begin() as connection:
+            connection.execute(Application.__table__.insert().values(
+                application_id=application_id, first_name='Replica', last_name='Only',
+                email='replica@test.com', phone='1234567890', date_of_birth=datetime(2000, 1, 1).date(),
+                address='Address', program='computer_science', previous_education='Education', gpa=3.5,
+                degree_certificate='d.pdf', id_proof='i.pdf', status='pending', submitted_at=datetime.utcnow()
+            ))
+
+    def test_read_only_views_use_replica(self, client, replica):
+        """Test that read-only views read from the replica and writes go to the primary"""
+        self.insert_on_replica(replica, 'APPREPLICA')
+        primary_id = create_application('APPPRIMARY', status='pending').id
+
+        assert b'APPREPLICA' in client.get('/admin/dashboard').data
+        assert client.get('/status/APPREPLICA').status_code == 200
+        assert [a['application_id'] for a in client.get('/api/applications').json] == ['APPREPLICA']
+
+        # approve is a write route, so it finds the primary's row
+        client.get(f'/admin/approve/{primary_id}')
+        response = client.get(f'/api/applications/{primary_id}')  # sticky after the write
+        assert (response.json['application_id'], response.json['status']) == ('APPPRIMARY', 'approved')
+
+    def test_read_your_writes_after_submission(self, client, replica, sample_application_data):
+        """Test that the status page after apply reads the primary even though the replica lags"""
+        data = dict(sample_application_data, degree_certificate=(BytesIO(b'%PDF-1.4 degree'), 'degree.pdf'),
+                    id_proof=(BytesIO(b'%PDF-1.4 id'), 'id.pdf'))
+        response = client.post('/apply', data=data, content_type='multipart/form-data', follow_redirects=True)
+        assert b'submitted successfully' in response.data
+        application = Application.query.one()
+        assert client.get(f'/status/{application.application_id}').status_code == 200
+
+        # Once the sticky window has passed (and the cached card expired), reads go back to the lagging replica
+        with client.session_transaction() as session:
+            session['read_primary_until'] = 0
+        status_cache.clear()
+        assert client.get(f'/status/{application.application_id}').status_code == 302
+
+class TestMigrations:
+    """Test the versioned migration runner"""
+
+    def test_migrations_add_indexes_to_existing_table(self, tmp_path):
+        """Test that migrations index a table created before the indexes existed"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+        with engine.begin() as connection:
+            connection.execute(text(
+                "CREATE TABLE application (id INTEGER PRIMARY KEY, status VARCHAR(20), "
+                "submitted_at DATETIME, email VARCHAR(120), program VARCHAR(100))"
+            ))
+
+        assert run_migrations(engine) == [version for version, _, _ in MIGRATIONS]
+        index_names = {index['name'] for index in inspect(engine).get_indexes('application')}
+        assert {'ix_application_status_submitted_at', 'ix_application_program_status',
+                'ix_application_email'} <= index_names
+        assert current_version(engine) == MIGRATIONS[-1][0]
+
+    def test_concurrent_workers_migrate_once(self, tmp_path):
+        """Test that workers booting together apply each migration exactly once without errors"""
+        import threading
+        path = tmp_path / 'shared.db'
+        with create_engine(f"sqlite:///{path}").begin() as connection:
+            connection.execute(text(
+                "CREATE TABLE application (id INTEGER PRIMARY KEY, status VARCHAR(20), "
+                "submitted_at DATETIME, email VARCHAR(120), program VARCHAR(100))"
+            ))
+        start = threading.Barrier(4)
+        ran, errors = [], []
+
+        def boot():
+            engine = create_engine(f"sqlite:///{path}")
+            start.wait()
+            try:
+                ran.extend(run_migrations(engine))
+            except Exception as e:
+                errors.append(e)
+            engine.dispose()
+
+        threads = [threading.Thread(target=boot) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == []
+        assert sorted(ran) == [version for version, _, _ in MIGRATIONS]
+
+    def test_migrations_are_idempotent(self, tmp_path):
+        """Test that a second run applies nothing"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+        db.metadata.create_all(engine)
+        run_migrations(engine)
+        assert run_migrations(engine) == []
+
 if __name__ == '__main__':
     pytest.main([__file__])
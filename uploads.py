@@ -0,0 +1,191 @@
+"""Streaming handling for uploaded documents.
+
+``UploadRequest`` hooks Werkzeug's multipart parser so that every file part
+is written straight into a spool file in the upload folder as it arrives, hashed on the fly,
+and checked as early as possible: the extension as soon as the part headers
+are parsed, the file signature once its first bytes arrive, and the size on
+every chunk. A bad upload aborts the parse (and the rest of the request body
+is never read) instead of being rejected after the whole body was spooled.
+"""
+import base64
+import hashlib
+import os
+import tempfile
+from flask import Request, current_app
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+
+# Extension -> accepted leading bytes
+ALLOWED_UPLOAD_TYPES = {
+    'pdf': (b'%PDF',),
+    'png': (b'\x89PNG\r\n\x1a\n',),
+    'jpg': (b'\xff\xd8\xff',),
+    'jpeg': (b'\xff\xd8\xff',),
+}
+
+class InvalidUpload(ValueError):
+    pass
+
+def format_size(size):
+    return f"{size / (1024 * 1024):.0f}MB" if size >= 1024 * 1024 else f"{size / 1024:.0f}KB"
+
+def upload_extension(filename):
+    return filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+
+def check_extension(filename):
+    """Return the accepted signatures for filename's extension, or raise UnsupportedMediaType"""
+    extension = upload_extension(filename)
+    if extension not in ALLOWED_UPLOAD_TYPES:
+        raise UnsupportedMediaType(
+            f"{filename}: only {', '.join(sorted(ALLOWED_UPLOAD_TYPES))} files are accepted"
+        )
+    return ALLOWED_UPLOAD_TYPES[extension]
+
+def check_signature(filename, head):
+    """Raise UnsupportedMediaType unless head starts with a signature allowed for filename"""
+    if not any(head.startswith(signature) for signature in check_extension(filename)):
+        raise UnsupportedMediaType(f"{filename} does not look like a .{upload_extension(filename)} file")
+
+def sniff_length(filename):
+    """Number of leading bytes needed to verify filename's signature"""
+    return max(len(s) for s in check_extension(filename))
+
+class UploadStream:
+    """Writable/readable stream that spools one uploaded file into the upload folder"""
+
+    def __init__(self, directory, filename, max_bytes):
+        self.sniff_bytes = sniff_length(filename)
+        self.filename = filename
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.sha256 = hashlib.sha256()
+        self.verified = False
+        self._head = b''
+        self._file = tempfile.NamedTemporaryFile(dir=directory, prefix='.upload-', delete=False)
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            self.close()
+            raise RequestEntityTooLarge(f"{self.filename} is larger than {format_size(self.max_bytes)}")
+        if not self.verified and len(self._head) < self.sniff_bytes:
+            self._head += data[:self.sniff_bytes - len(self._head)]
+            if len(self._head) >= self.sniff_bytes:
+                self._check_signature()
+        self.sha256.update(data)
+        return self._file.write(data)
+
+    def _check_signature(self):
+        try:
+            check_signature(self.filename, self._head)
+        except UnsupportedMediaType:
+            self.close()
+            raise
+        self.verified = True
+
+    @property
+    def hexdigest(self):
+        return self.sha256.hexdigest()
+
+    def verify(self):
+        """Check the signature of files too short to have been checked while streaming"""
+        if not self.verified:
+            self._check_signature()
+
+    def finish(self):
+        """Verify and close the spooled file, returning its path for storage to take over"""
+        self.verify()
+        self._file.close()
+        return self._file.name
+
+    def read(self, *args):
+        return self._file.read(*args)
+
+    def readline(self, *args):
+        return self._file.readline(*args)
+
+    def seek(self, *args):
+        return self._file.seek(*args)
+
+    def tell(self):
+        return self._file.tell()
+
+    def close(self):
+        """Close the stream, deleting the spooled file unless storage already took it"""
+        self._file.close()
+        try:
+            os.unlink(self._file.name)
+        except FileNotFoundError:
+            pass
+
+class UploadRequest(Request):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._upload_streams = []
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if not filename:
+            # Empty file inputs are left to form validation
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        stream = UploadStream(
+            current_app.config['UPLOAD_FOLDER'],
+            filename,
+            current_app.config['UPLOAD_MAX_FILE_BYTES']
+        )
+        self._upload_streams.append(stream)
+        return stream
+
+    def _load_form_data(self):
+        try:
+            super()._load_form_data()
+        except Exception:
+            # request.files is never set when a later part aborts the parse, so
+            # request.close() can't reach the files spooled for earlier parts
+            for stream in self._upload_streams:
+                stream.close()
+            raise
+
+# Resumable (tus-style) uploads
+def parse_upload_metadata(header):
+    """Parse a tus Upload-Metadata header ("key base64value,key2 base64value") into a dict"""
+    metadata = {}
+    for pair in (header or '').split(','):
+        parts = pair.strip().split(' ', 1)
+        if not parts[0]:
+            continue
+        value = base64.b64decode(parts[1]).decode('utf-8') if len(parts) > 1 else ''
+        metadata[parts[0]] = value
+    return metadata
+
+def append_upload_chunk(path, stream, offset, length, filename, chunk_size=64 * 1024):
+    """Append bytes from stream to the partial upload at path, starting at offset.
+
+    Never writes past length, and verifies the file signature as soon as
+    enough leading bytes have arrived. Returns the new offset. If the client
+    disconnects or sends bad data an exception propagates, but everything
+    already written stays on disk, so the size of the file at path is always
+    the offset to resume from.
+    """
+    sniff_bytes = sniff_length(filename)
+    with open(path, 'r+b') as f:
+        f.seek(offset)
+        f.truncate()
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            if f.tell() + len(chunk) > length:
+                raise RequestEntityTooLarge(f"{filename}: more data than the declared {length} bytes")
+            f.write(chunk)
+            if offset < sniff_bytes and f.tell() >= min(sniff_bytes, length):
+                f.flush()
+                with open(path, 'rb') as head:
+                    check_signature(filename, head.read(sniff_bytes))
+                offset = sniff_bytes
+        return f.tell()
+
+def file_sha256(path, chunk_size=64 * 1024):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()